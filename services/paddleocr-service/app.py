@@ -2,45 +2,454 @@
 # PaddleOCR extraction service — accepts PDF, returns structured JSON.
 # Deployed as a standalone container (Railway, Fly, etc).
 #
-# Performance: batch-rasterize all pages once, then OCR sequentially.
-# PaddlePaddle's PP-Structure is not thread-safe so we can't parallelize
-# the OCR step, but eliminating per-page rasterization is the big win.
+# Performance: rasterize pages in bounded windows (one PDF parse per window,
+# not per page), then OCR sequentially. PaddlePaddle's PP-Structure is not
+# thread-safe, so parallel OCR (OCR_WORKERS > 1) uses worker processes that
+# each own an engine.
 
 import asyncio
-import gc
-import html as html_module
+import hashlib
+import json
 import logging
 import os
 import re
+import subprocess
+import threading
 import time
 import uuid
 import tempfile
+import xml.etree.ElementTree as ET
+from collections.abc import Awaitable, Callable, Iterable, Iterator
 from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing, asynccontextmanager, closing
+from dataclasses import asdict, dataclass
 from functools import partial
 from pathlib import Path
 
-import numpy as np
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
-from pdf2image import convert_from_path, pdfinfo_from_path
+import httpx
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request, Depends, Header, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pdf2image import pdfinfo_from_path
+from pdf2image.exceptions import PDFPageCountError, PDFPopplerTimeoutError
 from paddleocr import PPStructure
 
+from cancellation import CLIENT_DISCONNECT, DEADLINE, Cancelled, CancelToken
+from coordinator import (
+    Shard,
+    ShardFailed,
+    merge_shards,
+    parse_peers,
+    run_shards,
+    send_shard,
+    split_pdf,
+    split_ranges,
+)
+from jobs import Job, JobManager, JobQueueFull
+from memory import PeakRssSampler
+from buffers import PageBufferPool
+from engine_profiles import (
+    DEFAULT_PROFILE,
+    FEATURES,
+    ROUTES,
+    ROUTINGS,
+    features_for,
+    page_fingerprint,
+    page_route,
+    profile_for,
+)
+from ocr_pool import OcrProcessPool, run_engine
+from pipeline import Pipeline
+from remote_source import (
+    SOURCE_ERROR_HEADER,
+    SourceFetchError,
+    SourceRejected,
+    SourceTooLarge,
+    check_url,
+    download,
+    filename_from_url,
+    parse_allowed_hosts,
+)
+from raster import (
+    DPI_MODES,
+    RASTER_BACKENDS,
+    RASTER_MODES,
+    DpiPolicy,
+    PageRasterizer,
+    RenderError,
+    read_page_sizes,
+)
+from responses import (
+    OPTIONAL_FIELDS,
+    ResponseOptions,
+    dumps,
+    encode_response,
+    select_fields,
+    select_page_fields,
+)
+from result_cache import DiskCache, pixel_key
+from scheduler import DEFAULT_TENANT, DocumentGate, FairScheduler, Ticket
+from singleflight import SingleFlight
+from tables import parse_table_html
+from telemetry import (
+    CANCELLATIONS,
+    CANCELLED_PAGES,
+    COALESCED_REQUESTS,
+    DOCUMENTS_IN_FLIGHT,
+    EXECUTOR_QUEUE_DEPTH,
+    JOB_QUEUE_DEPTH,
+    PAGE_ROUTES,
+    PAGES,
+    READY,
+    REGIONS,
+    REJECTIONS,
+    STAGE_SECONDS,
+    TABLES,
+    WARMUP_SECONDS,
+)
+from warmup import synthetic_page
+from text_layer import TextLayerPage, assess_page, build_text_layer_page, read_text_layer
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("paddleocr-service")
 
-app = FastAPI(title="PaddleOCR Extraction Service", version="1.3.0")
+SERVICE_VERSION = "1.3.0"
+ENGINE_VERSION = "paddleocr-pp-structure-2.9.1"
+
+# PP-Structure constructor options. Part of the cache keys — anything that
+# changes OCR output must live here (or in ExtractOptions). recovery only
+# re-bases per-line text boxes for docx rebuilding; run_engine drops those
+# boxes, so it would be paid for and thrown away.
+ENGINE_OPTIONS = {"lang": "en", "recovery": False}
+
+# "full" runs the whole PP-Structure pass on every page when tables are
+# wanted; "auto" runs the layout model first and the table structure model
+# only on pages where it finds a table (each page reports its route).
+ENGINE_ROUTING = os.environ.get("ENGINE_ROUTING", "full")
+if ENGINE_ROUTING not in ROUTINGS:
+    raise ValueError(f"Unknown ENGINE_ROUTING {ENGINE_ROUTING!r} (expected one of {ROUTINGS})")
+
+# "ocr" runs every page through PP-Structure; "hybrid" takes pages with a
+# usable embedded text layer directly and OCRs only the rest. Overridable
+# per request with ?mode=.
+EXTRACT_MODES = ("ocr", "hybrid")
+EXTRACT_MODE = os.environ.get("EXTRACT_MODE", "ocr")
+
+
+@dataclass(frozen=True)
+class ExtractOptions:
+    """Per-request settings that change extraction output (and the cache key)."""
+
+    mode: str = EXTRACT_MODE
+    # Engine pass for OCR'd pages, from ?features= (see engine_profiles)
+    profile: str = DEFAULT_PROFILE
+
+
+def _extract_options(
+    mode: str | None = Query(None), features: str | None = Query(None)
+) -> ExtractOptions:
+    """FastAPI dependency: validate per-request options from the query string."""
+    mode = mode or EXTRACT_MODE
+    if mode not in EXTRACT_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown mode {mode!r}. Expected one of {EXTRACT_MODES}"
+        )
+    requested = frozenset(name.strip() for name in (features or "").split(",") if name.strip())
+    unknown = requested - set(FEATURES)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown features: {', '.join(sorted(unknown))}. Expected any of {FEATURES}",
+        )
+    return ExtractOptions(mode=mode, profile=profile_for(requested, ENGINE_ROUTING))
+
+
+def _field_list(value: str | None, param: str) -> set[str]:
+    names = {name.strip() for name in (value or "").split(",") if name.strip()}
+    unknown = names - set(OPTIONAL_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Unknown {param} field(s) {sorted(unknown)}. "
+                f"Expected any of {OPTIONAL_FIELDS}"
+            ),
+        )
+    return names
+
+
+def _response_options(
+    include: str | None = Query(None), exclude: str | None = Query(None)
+) -> ResponseOptions:
+    """FastAPI dependency: which optional result fields to send.
+
+    include= keeps only the listed optional fields, exclude= drops the
+    listed ones; core fields (ids, page numbers, sizes, tables' rows/cols)
+    are always sent.
+    """
+    omit = _field_list(exclude, "exclude")
+    if include is not None:
+        omit |= set(OPTIONAL_FIELDS) - _field_list(include, "include")
+    return ResponseOptions(omit=frozenset(omit))
+
+
+def _cancel_token(x_request_timeout_ms: int | None = Header(None)) -> CancelToken:
+    """FastAPI dependency: a cancellation token for this request.
+
+    X-Request-Timeout-Ms sets a server-side deadline, counted from when the
+    upload has been received; past it the extraction stops at the next page
+    boundary and the request fails with 504.
+    """
+    if x_request_timeout_ms is None:
+        return CancelToken()
+    if x_request_timeout_ms <= 0:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout-Ms must be positive")
+    return CancelToken(deadline=time.monotonic() + x_request_timeout_ms / 1000)
+
+
+def _tenant(x_tenant_id: str | None = Header(None)) -> str:
+    """FastAPI dependency: who the request is for (the caller's IMO id), for
+    fair scheduling. Requests without X-Tenant-Id share one tenant."""
+    tenant = (x_tenant_id or "").strip()
+    if not tenant:
+        return DEFAULT_TENANT
+    if len(tenant) > 64:
+        raise HTTPException(status_code=400, detail="X-Tenant-Id is too long (max 64)")
+    return tenant
+
+
+def _cancelled_error(err: Cancelled) -> HTTPException:
+    if err.reason == DEADLINE:
+        return HTTPException(status_code=504, detail="Extraction deadline exceeded")
+    # Nobody is listening; 499 is what proxies log for a client-closed request
+    return HTTPException(status_code=499, detail="Client closed request")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if OCR_WORKERS > 1 and OCR_POOL_START_METHOD == "fork":
+        # Blocks startup while the engine loads: forking is only safe before
+        # the executor and to_thread workers exist.
+        if threading.active_count() > 1:
+            logger.warning(
+                f"Forking OCR workers with {threading.active_count()} threads running"
+            )
+        _start_ocr_pool()
+    global _http_client
+    _http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(SOURCE_URL_TIMEOUT_S, connect=10), follow_redirects=False
+    )
+    _jobs.start()
+    warm_up_task = None
+    if WARMUP_ENABLED:
+        # In the background, so /health answers while models load
+        warm_up_task = asyncio.create_task(_run_warm_up(), name="engine-warm-up")
+    else:
+        _warm_up_state["status"] = "ready"
+        READY.set(1)
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await _jobs.stop()
+    await _http_client.aclose()
+
+
+app = FastAPI(title="PaddleOCR Extraction Service", version=SERVICE_VERSION, lifespan=lifespan)
 
 # Lazy-init the engine on first request (avoids slow import at module level
 # in some deployment environments).
 _engine: PPStructure | None = None
 
+# Documents in progress at once. Each drives its own rasterize/OCR threads,
+# but the in-process engine still runs one page at a time, taking turns per
+# _scheduler; extra documents wait for a thread at _documents, in fair order.
+OCR_MAX_ACTIVE_DOCUMENTS = int(os.environ.get("OCR_MAX_ACTIVE_DOCUMENTS", "4"))
+
 # Thread pool for CPU-bound OCR work — keeps event loop free for health checks
-_executor = ThreadPoolExecutor(max_workers=1)
+_executor = ThreadPoolExecutor(max_workers=max(1, OCR_MAX_ACTIVE_DOCUMENTS))
+# Tasks submitted to _executor that no thread has picked up yet (a thread
+# still winding down after its slot was released). Counted here rather than
+# read from the executor's private queue.
+_executor_queued = 0
+_executor_queued_lock = threading.Lock()
+# Documents waiting for admission, plus those queued on the executor itself
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: _documents.waiting + _executor_queued)
+
+# Separate small pool for admission work (pdfinfo page counts) so a new
+# upload is sized — and rejected when over MAX_PAGES or not a PDF — in
+# milliseconds, however long the OCR executor's queue is. Nothing slow
+# runs here: pdfinfo is bounded by PDFINFO_TIMEOUT_S.
+ADMISSION_WORKERS = int(os.environ.get("ADMISSION_WORKERS", "4"))
+PDFINFO_TIMEOUT_S = float(os.environ.get("PDFINFO_TIMEOUT_S", "10"))
+_admission_executor = ThreadPoolExecutor(
+    max_workers=max(1, ADMISSION_WORKERS), thread_name_prefix="admission"
+)
+
+# Worker-process pool, created on first use when OCR_WORKERS > 1. Once it
+# has failed we stay on the single-engine path for the life of the process.
+_ocr_pool: OcrProcessPool | None = None
+_ocr_pool_failed = False
+_ocr_pool_lock = threading.Lock()
+_engine_init_lock = threading.Lock()
 
 MAX_FILE_BYTES = int(os.environ.get("MAX_FILE_BYTES", str(10 * 1024 * 1024)))  # 10MB
 MAX_PAGES = int(os.environ.get("MAX_PAGES", "100"))
+# PDF header; the spec lets it sit anywhere in the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
 DPI = int(os.environ.get("PADDLEOCR_DPI", "150"))
 
+# Per-page DPI — "fixed" renders every page at PADDLEOCR_DPI. "adaptive" sizes
+# each page so a typical text line (measured from the text layer) comes out
+# ~RASTER_TARGET_LINE_PX tall, within RASTER_MIN_DPI..RASTER_MAX_DPI; pages
+# with no measurable text use PADDLEOCR_DPI. Adaptive pages are also capped
+# at RASTER_MAX_PIXELS, which reins in oversized spreads.
+RASTER_DPI_MODE = os.environ.get("RASTER_DPI_MODE", "fixed")
+if RASTER_DPI_MODE not in DPI_MODES:
+    raise ValueError(
+        f"Unknown RASTER_DPI_MODE {RASTER_DPI_MODE!r} (expected one of {DPI_MODES})"
+    )
+RASTER_MIN_DPI = int(os.environ.get("RASTER_MIN_DPI", "100"))
+RASTER_MAX_DPI = int(os.environ.get("RASTER_MAX_DPI", "300"))
+RASTER_TARGET_LINE_PX = int(os.environ.get("RASTER_TARGET_LINE_PX", "25"))
+RASTER_MAX_PIXELS = int(os.environ.get("RASTER_MAX_PIXELS", str(6_000_000)))
+
+_dpi_policy = DpiPolicy(
+    base_dpi=DPI,
+    min_dpi=RASTER_MIN_DPI,
+    max_dpi=RASTER_MAX_DPI,
+    target_line_px=RASTER_TARGET_LINE_PX,
+    max_pixels=RASTER_MAX_PIXELS,
+)
+
+# Render pages single-channel (1 byte/pixel instead of 3). Pages are widened
+# back to RGB only while inside the engine.
+RASTER_GRAYSCALE = os.environ.get("RASTER_GRAYSCALE", "0") == "1"
+
+# Rasterization — "windowed" bounds peak memory by RASTER_WINDOW_PAGES instead
+# of page count; "batch" renders the whole PDF up front (legacy behaviour).
+RASTER_MODE = os.environ.get("RASTER_MODE", "windowed")
+if RASTER_MODE not in RASTER_MODES:
+    raise ValueError(f"Unknown RASTER_MODE {RASTER_MODE!r} (expected one of {RASTER_MODES})")
+RASTER_WINDOW_PAGES = int(os.environ.get("RASTER_WINDOW_PAGES", "8"))
+RASTER_THREADS = int(os.environ.get("RASTER_THREADS", "2"))
+# "pdf2image" (PPM files → PIL → NumPy) or "pnm" (pdftoppm's stdout read
+# straight into NumPy; pages stream as they render, RASTER_THREADS unused).
+RASTER_BACKEND = os.environ.get("RASTER_BACKEND", "pdf2image")
+if RASTER_BACKEND not in RASTER_BACKENDS:
+    raise ValueError(
+        f"Unknown RASTER_BACKEND {RASTER_BACKEND!r} (expected one of {RASTER_BACKENDS})"
+    )
+
+# Multi-process OCR — OCR_WORKERS > 1 spreads each document's pages across
+# that many worker processes, each with its own engine (~1GB apiece when
+# spawned). 1 keeps the single in-process engine.
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "1"))
+OCR_POOL_CHUNK_PAGES = int(os.environ.get("OCR_POOL_CHUNK_PAGES", "2"))
+
+# How pool workers start — "spawn" loads a fresh engine in each worker on
+# first use. "fork" (preload-then-fork) loads the engine once in the server
+# process at startup and forks the workers from it, so the weights are
+# shared copy-on-write; the server process itself only answers HTTP and
+# never runs OCR while the pool is up.
+OCR_POOL_START_METHOD = os.environ.get("OCR_POOL_START_METHOD", "spawn")
+
+# Executor threads, in-process engine turns and worker-pool chunk slots are
+# all handed out round robin across tenants (X-Tenant-Id), then shortest
+# document first within a tenant. Each SCHEDULER_AGING_S_PER_PAGE seconds a
+# document waits counts as one page less, so big documents still get through.
+SCHEDULER_AGING_S_PER_PAGE = float(os.environ.get("SCHEDULER_AGING_S_PER_PAGE", "2"))
+_documents = DocumentGate(OCR_MAX_ACTIVE_DOCUMENTS, aging_s_per_page=SCHEDULER_AGING_S_PER_PAGE)
+_scheduler = FairScheduler(aging_s_per_page=SCHEDULER_AGING_S_PER_PAGE)
+# One slot per worker process: chunks past that wait here, not in the
+# process pool's own first-come-first-served queue
+_pool_scheduler = FairScheduler(
+    aging_s_per_page=SCHEDULER_AGING_S_PER_PAGE, capacity=max(1, OCR_WORKERS)
+)
+
+# Single-engine path: overlap rasterize / OCR / block assembly in separate
+# threads, with PIPELINE_QUEUE_SIZE pages buffered between stages.
+PIPELINE_ENABLED = os.environ.get("PIPELINE_ENABLED", "1") == "1"
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "2"))
+
+# Page bitmaps are rendered into reused arrays and released after OCR
+# rather than left to the collector; up to PAGE_BUFFER_POOL_BYTES of free
+# ones are kept per process (server and each pool worker). 0 disables.
+PAGE_BUFFER_POOL_BYTES = int(os.environ.get("PAGE_BUFFER_POOL_BYTES", str(128 * 1024 * 1024)))
+_page_buffers = PageBufferPool(PAGE_BUFFER_POOL_BYTES)
+
+# Result cache — identical uploads with identical options skip OCR entirely.
+# Set RESULT_CACHE_MAX_BYTES=0 to disable.
+RESULT_CACHE_DIR = os.environ.get(
+    "RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "paddleocr-results")
+)
+RESULT_CACHE_MAX_BYTES = int(
+    os.environ.get("RESULT_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)  # 512MB
+
+_result_cache = DiskCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+
+# Page cache — OCR output per rendered page, keyed on the page pixels, so a
+# re-issued guide only pays OCR for pages that actually changed.
+PAGE_CACHE_DIR = os.environ.get(
+    "PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "paddleocr-pages")
+)
+PAGE_CACHE_MAX_BYTES = int(
+    os.environ.get("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+)  # 256MB
+
+_page_cache = DiskCache(PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES)
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Identical /api/extract requests (same bytes, same options) that overlap
+# share one extraction rather than each queueing its own.
+_flights = SingleFlight()
+
+# Async jobs — at most JOB_QUEUE_SIZE jobs wait behind the running one
+# (more get 429 + Retry-After); finished results live JOB_RESULT_TTL_SECONDS.
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "8"))
+JOB_RESULT_TTL_SECONDS = int(os.environ.get("JOB_RESULT_TTL_SECONDS", "900"))
+
+# Results at least this large are compressed (zstd or gzip, per the
+# client's Accept-Encoding).
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+
+# Load the engine (or start the worker pool) at startup and push a synthetic
+# page through it; /ready answers 503 until that has finished. 0 keeps the
+# old lazy load on first request, with /ready always ready.
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1") == "1"
+
+# status: pending → warming → ready | failed
+_warm_up_state: dict = {"status": "pending", "warmup_ms": None, "error": None}
+
+# Fetch-by-URL sources (source_url form field) — only these hosts, comma
+# separated (host or host:port); empty disables fetching by URL.
+SOURCE_URL_ALLOWED_HOSTS = parse_allowed_hosts(os.environ.get("SOURCE_URL_ALLOWED_HOSTS", ""))
+SOURCE_URL_TIMEOUT_S = float(os.environ.get("SOURCE_URL_TIMEOUT_S", "60"))
+
+# Shared client for source downloads, opened in lifespan()
+_http_client: httpx.AsyncClient | None = None
+
+# Coordinator mode — documents of COORDINATOR_MIN_PAGES or more are split
+# into page-range shards and extracted on these peer replicas (comma-separated
+# base URLs; empty disables), COORDINATOR_SHARD_ATTEMPTS tries per shard on
+# different peers. List this replica's own URL for it to take shards too.
+# Shards must stay below the threshold so no shard is fanned out again.
+COORDINATOR_PEERS = parse_peers(os.environ.get("COORDINATOR_PEERS", ""))
+COORDINATOR_MIN_PAGES = int(os.environ.get("COORDINATOR_MIN_PAGES", "20"))
+COORDINATOR_SHARD_PAGES = int(os.environ.get("COORDINATOR_SHARD_PAGES", "10"))
+COORDINATOR_SHARD_ATTEMPTS = int(os.environ.get("COORDINATOR_SHARD_ATTEMPTS", "3"))
+COORDINATOR_SHARD_TIMEOUT_S = float(os.environ.get("COORDINATOR_SHARD_TIMEOUT_S", "600"))
+if COORDINATOR_PEERS and not 0 < COORDINATOR_SHARD_PAGES < COORDINATOR_MIN_PAGES:
+    raise ValueError(
+        f"COORDINATOR_SHARD_PAGES ({COORDINATOR_SHARD_PAGES}) must be between 1 and "
+        f"COORDINATOR_MIN_PAGES - 1 ({COORDINATOR_MIN_PAGES - 1})"
+    )
+
+# Batch extraction — most files accepted in one /api/extract/batch request.
+MAX_BATCH_FILES = int(os.environ.get("MAX_BATCH_FILES", "30"))
+
 # API key for request authentication — optional (skip auth if not set).
 PADDLEOCR_API_KEY = os.environ.get("PADDLEOCR_API_KEY")
 
@@ -52,185 +461,780 @@ def verify_api_key(request: Request):
         return
     key = request.headers.get("x-api-key")
     if key != PADDLEOCR_API_KEY:
+        REJECTIONS.labels("unauthorized").inc()
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 
 def get_engine() -> PPStructure:
     global _engine
-    if _engine is None:
-        logger.info("Initializing PP-Structure engine...")
-        _engine = PPStructure(show_log=False, recovery=True, lang="en")
-        logger.info("PP-Structure engine ready")
+    with _engine_init_lock:
+        if _engine is None:
+            logger.info("Initializing PP-Structure engine...")
+            _engine = PPStructure(show_log=False, **ENGINE_OPTIONS)
+            logger.info("PP-Structure engine ready")
     return _engine
 
 
+def _start_ocr_pool() -> None:
+    global _ocr_pool
+    logger.info(
+        f"Starting OCR process pool with {OCR_WORKERS} workers ({OCR_POOL_START_METHOD})..."
+    )
+    try:
+        preloaded = None
+        if OCR_POOL_START_METHOD == "fork":
+            # Loads weights only — no inference in the parent before it
+            # forks, so the workers don't inherit half-initialised OpenMP state
+            preloaded = get_engine()
+        _ocr_pool = OcrProcessPool(
+            OCR_WORKERS,
+            ENGINE_OPTIONS,
+            _page_cache,
+            _engine_fingerprint(),
+            chunk_pages=OCR_POOL_CHUNK_PAGES,
+            raster_backend=RASTER_BACKEND,
+            start_method=OCR_POOL_START_METHOD,
+            preloaded_engine=preloaded,
+            page_buffer_bytes=PAGE_BUFFER_POOL_BYTES,
+            scheduler=_pool_scheduler,
+        )
+        if OCR_POOL_START_METHOD == "fork":
+            _ocr_pool.start()
+    except (OSError, ValueError, BrokenProcessPool):
+        logger.exception("Could not start OCR process pool — using single engine")
+        _disable_ocr_pool()
+
+
+def get_ocr_pool() -> OcrProcessPool | None:
+    """Return the worker pool, or None when OCR should run in-process."""
+    if OCR_WORKERS <= 1 or _ocr_pool_failed:
+        return None
+    # A forked pool only ever starts in lifespan(), before any thread exists
+    if _ocr_pool is None and OCR_POOL_START_METHOD != "fork":
+        # Concurrent first requests (and warm-up) would each start a pool
+        with _ocr_pool_lock:
+            if _ocr_pool is None and not _ocr_pool_failed:
+                _start_ocr_pool()
+    return _ocr_pool
+
+
+def _warm_up() -> None:
+    """Load the engine(s) and run one synthetic page. Holds one document slot
+    on the OCR executor; requests that arrive meanwhile get the others, and
+    wait for the engine or pool to finish loading if they need it first."""
+    pool = get_ocr_pool()
+    if pool is not None:
+        try:
+            pool.warm_up(DPI)
+            return
+        except BrokenProcessPool:
+            logger.exception("OCR process pool broke during warm-up — using single engine")
+            _disable_ocr_pool()
+    engine = get_engine()
+    with _scheduler.turn(Ticket("warm-up", 1)):
+        run_engine(engine, synthetic_page(DPI))
+
+
+async def _run_warm_up() -> None:
+    _warm_up_state["status"] = "warming"
+    start = time.time()
+    try:
+        await _run_document(Ticket("warm-up", 1), _warm_up)
+    except Exception as err:
+        logger.exception("Engine warm-up failed")
+        _warm_up_state.update({"status": "failed", "error": str(err)})
+        return
+    elapsed = time.time() - start
+    _warm_up_state.update({"status": "ready", "warmup_ms": int(elapsed * 1000)})
+    WARMUP_SECONDS.set(elapsed)
+    READY.set(1)
+    logger.info(f"Engine warm-up complete in {_warm_up_state['warmup_ms']}ms")
+
+
+def _disable_ocr_pool() -> None:
+    global _ocr_pool, _ocr_pool_failed
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown()
+    _ocr_pool = None
+    _ocr_pool_failed = True
+
+
+def _fingerprint(settings: dict) -> str:
+    encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def _raster_settings() -> dict:
+    settings = {"dpi": DPI, "dpi_mode": RASTER_DPI_MODE, "grayscale": RASTER_GRAYSCALE}
+    if RASTER_DPI_MODE == "adaptive":
+        settings["dpi_policy"] = asdict(_dpi_policy)
+    return settings
+
+
+def _engine_fingerprint() -> str:
+    """Short hash of the settings that affect OCR output for a single page."""
+    return _fingerprint(
+        {"raster": _raster_settings(), "engine": ENGINE_OPTIONS, "engine_version": ENGINE_VERSION}
+    )
+
+
+def _extraction_fingerprint(options: ExtractOptions) -> str:
+    """Short hash of every setting that affects a whole document's output."""
+    return _fingerprint({"engine": _engine_fingerprint(), "options": asdict(options)})
+
+
+def _result_cache_key(content_sha256: str, options: ExtractOptions) -> str:
+    return f"{content_sha256}-{_extraction_fingerprint(options)}"
+
+
+def _result_payload(
+    result: dict,
+    content_sha256: str,
+    processing_time_ms: int,
+    cached: bool,
+    metrics: dict | None = None,
+    coalesced: bool = False,
+) -> dict:
+    return {
+        "document_id": str(uuid.uuid4()),
+        "page_count": len(result["pages"]),
+        "pages": result["pages"],
+        "tables": result["tables"],
+        "processing_time_ms": processing_time_ms,
+        "engine_version": ENGINE_VERSION,
+        "content_sha256": content_sha256,
+        "cached": cached,
+        "coalesced": coalesced,
+        "metrics": metrics or {},
+    }
+
+
+async def _encoded_response(
+    payload: dict, request: Request, response_options: ResponseOptions
+) -> Response:
+    """Shape, serialize and compress a result payload off the event loop."""
+    return await asyncio.to_thread(
+        encode_response,
+        payload,
+        response_options,
+        request.headers.get("accept-encoding", ""),
+        RESPONSE_COMPRESS_MIN_BYTES,
+    )
+
+
+async def _result_response(
+    request: Request,
+    response_options: ResponseOptions,
+    result: dict,
+    content_sha256: str,
+    processing_time_ms: int,
+    cached: bool,
+    metrics: dict | None = None,
+    coalesced: bool = False,
+) -> Response:
+    payload = _result_payload(
+        result, content_sha256, processing_time_ms, cached, metrics, coalesced
+    )
+    return await _encoded_response(payload, request, response_options)
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "engine": "paddleocr-pp-structure", "version": "1.3.0"}
+    return {
+        "status": "ok",
+        "engine": "paddleocr-pp-structure",
+        "version": SERVICE_VERSION,
+        "result_cache": _result_cache.stats(),
+        "page_cache": _page_cache.stats(),
+        "jobs": _jobs.stats(),
+        "coalescing": _flights.stats(),
+        "scheduler": {
+            "documents": _documents.stats(),
+            "engine": _scheduler.stats(),
+            "pool": _pool_scheduler.stats(),
+        },
+        "page_buffers": _page_buffers.stats(),
+        "coordinator": {"peers": len(COORDINATOR_PEERS), "min_pages": COORDINATOR_MIN_PAGES},
+        "warm_up": _warm_up_state,
+        "ocr_pool": {
+            "workers": _ocr_pool.workers if _ocr_pool is not None else 0,
+            "start_method": OCR_POOL_START_METHOD,
+        },
+    }
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the engine is loaded and warm, else 503.
+
+    /health only says the process is up; route traffic on this instead.
+    """
+    status_code = 200 if _warm_up_state["status"] == "ready" else 503
+    return JSONResponse(_warm_up_state, status_code=status_code)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.api_route("/api/results/{sha256}", methods=["GET", "HEAD"])
+async def get_cached_result(
+    sha256: str,
+    request: Request,
+    options: ExtractOptions = Depends(_extract_options),
+    response_options: ResponseOptions = Depends(_response_options),
+    _auth=Depends(verify_api_key),
+):
+    """Look up a previous extraction by the SHA-256 of the PDF bytes.
+
+    HEAD answers 200/404 without a body so callers can decide whether to
+    upload at all; GET returns the same payload /api/extract would. Takes the
+    same options as /api/extract, since they are part of the cache key.
+    """
+    sha256 = sha256.lower()
+    if not _SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Expected a hex SHA-256 digest")
+
+    start = time.time()
+    key = _result_cache_key(sha256, options)
+    if request.method == "HEAD":
+        return Response(status_code=200 if _result_cache.contains(key) else 404)
+
+    cached = await asyncio.to_thread(_result_cache.get, key)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="No cached result for this document")
+    processing_time_ms = int((time.time() - start) * 1000)
+    return await _result_response(
+        request, response_options, cached, sha256, processing_time_ms, cached=True
+    )
+
 
+def _process_pdf_sync(
+    tmp_path: str, total_pages: int, options: ExtractOptions, ticket: Ticket | None = None
+) -> dict:
+    """Synchronous PDF processing — runs in thread pool to avoid blocking event loop."""
+    metrics: dict = {}
+    pages = list(_iter_pdf_pages(tmp_path, total_pages, metrics, options, ticket))
+    tables = [table for page in pages for table in page["tables"]]
+    return {"pages": pages, "tables": tables, "metrics": metrics}
 
-def _process_pdf_sync(tmp_path: str, total_pages: int) -> dict:
-    """Synchronous PDF processing — runs in thread pool to avoid blocking event loop.
+
+def _iter_pdf_pages(
+    tmp_path: str,
+    total_pages: int,
+    metrics: dict,
+    options: ExtractOptions,
+    ticket: Ticket | None = None,
+) -> Iterator[dict]:
+    """Yield finished response pages in order; fills metrics as it goes.
 
     Performance strategy:
-    - Batch-rasterize ALL pages in one pdf2image call (avoids re-parsing PDF per page)
+    - In hybrid mode, pages with a usable embedded text layer skip
+      rasterization and OCR entirely
+    - Rasterize pages in windows of RASTER_WINDOW_PAGES (one PDF parse per
+      window, not per page; peak memory bounded by the window, not page count)
     - Process each rasterized image through PP-Structure sequentially
-      (PP-Structure is not thread-safe)
+      (PP-Structure is not thread-safe), overlapped with rasterizing the next
+      page and assembling blocks for the previous one
     - Free each image immediately after OCR to control memory
+    - Hand each page to the caller as soon as it is built, so streaming
+      callers never hold the whole document
+    - Take turns on the engine per `ticket` (tenant and page count) with
+      the other documents in progress
+    - Check the ticket's cancel token between pages; a cancelled document
+      raises Cancelled at the next page boundary
     """
-    engine = get_engine()
-    pages = []
-    all_tables = []
+    ticket = ticket or Ticket(DEFAULT_TENANT, total_pages)
+    cancel = ticket.cancel
+    cache_hit_pages = []
+    pages_done = 0
+    try:
+        with DOCUMENTS_IN_FLIGHT.track_inprogress(), PeakRssSampler() as rss:
+            for page in _extract_pages(tmp_path, total_pages, metrics, options, ticket):
+                # Pool, cache and text-layer pages never wait for an engine turn
+                ticket.mark_started()
+                if page["cache_hit"]:
+                    cache_hit_pages.append(page["page_number"])
+                pages_done += 1
+                yield page
+    finally:
+        if cancel.cancelled and pages_done < total_pages:
+            logger.info(
+                f"Extraction cancelled ({cancel.reason}) after {pages_done}/{total_pages} pages"
+            )
+            CANCELLATIONS.labels(cancel.reason).inc()
+            CANCELLED_PAGES.inc(total_pages - pages_done)
+
+    if cache_hit_pages:
+        logger.info(f"Page cache hits: {len(cache_hit_pages)}/{total_pages} pages")
+    metrics["page_cache_hit_pages"] = cache_hit_pages
 
-    # === BATCH RASTERIZE ===
-    # Single call converts all pages. This reads the PDF once instead of N times.
-    raster_start = time.time()
-    logger.info(f"Batch-rasterizing {total_pages} pages at {DPI} DPI...")
-    all_images = convert_from_path(tmp_path, dpi=DPI)
-    raster_ms = int((time.time() - raster_start) * 1000)
-    logger.info(f"Rasterization complete: {len(all_images)} pages in {raster_ms}ms")
+    logger.info(
+        f"Peak RSS {rss.peak_bytes // (1024 * 1024)}MB "
+        f"(started at {rss.start_bytes // (1024 * 1024)}MB)"
+    )
+    metrics["rss_start_bytes"] = rss.start_bytes
+    metrics["peak_rss_bytes"] = rss.peak_bytes
 
-    # === OCR EACH PAGE ===
-    for page_idx, img in enumerate(all_images):
-        page_num = page_idx + 1
-        ocr_start = time.time()
 
-        img_array = np.array(img)
-        width, height = img.width, img.height
+def _extract_pages(
+    tmp_path: str, total_pages: int, metrics: dict, options: ExtractOptions, ticket: Ticket
+) -> Iterator[dict]:
+    """Merge text-layer pages (hybrid mode) and OCR'd pages back into page order."""
+    cancel = ticket.cancel
+    # Cancelled while queued for the executor: do no work at all
+    cancel.check()
+    layer = {}
+    if options.mode == "hybrid" or RASTER_DPI_MODE == "adaptive":
+        layer = _read_text_layer(tmp_path, total_pages, metrics)
+    text_pages = {}
+    if options.mode == "hybrid":
+        text_pages = _usable_text_layer_pages(layer, total_pages, metrics)
+    page_dpi = _plan_page_dpi(tmp_path, total_pages, layer, metrics)
+    del layer
 
-        # Free PIL image immediately
-        all_images[page_idx] = None  # type: ignore[assignment]
-        del img
+    ocr_page_numbers = [n for n in range(1, total_pages + 1) if n not in text_pages]
+    metrics["ocr_pages"] = len(ocr_page_numbers)
+    metrics["engine_profile"] = options.profile
+    ocr_results = _ocr_pages(
+        tmp_path, ocr_page_numbers, total_pages, metrics, page_dpi, options.profile, ticket
+    )
+    try:
+        for page_num in range(1, total_pages + 1):
+            cancel.check()
+            text_page = text_pages.pop(page_num, None)
+            if text_page is not None:
+                PAGES.labels("text_layer").inc()
+                yield build_text_layer_page(text_page, page_dpi[page_num])
+            else:
+                yield next(ocr_results)
+        # Let the OCR generator run its completion bookkeeping
+        for _ in ocr_results:
+            pass
+    finally:
+        ocr_results.close()
 
-        result = engine(img_array)
-        del img_array
 
-        ocr_ms = int((time.time() - ocr_start) * 1000)
-        logger.info(f"Page {page_num}/{total_pages}: {len(result)} regions in {ocr_ms}ms")
+def _read_text_layer(tmp_path: str, total_pages: int, metrics: dict) -> dict[int, TextLayerPage]:
+    """The embedded text layer for every page, or {} when it can't be read."""
+    start = time.time()
+    try:
+        layer = read_text_layer(tmp_path, 1, total_pages)
+    except (OSError, subprocess.SubprocessError, ET.ParseError) as err:
+        logger.warning(f"Text layer unavailable ({err})")
+        return {}
+    STAGE_SECONDS.labels("text_layer").observe(time.time() - start)
+    metrics["text_layer_ms"] = int((time.time() - start) * 1000)
+    return layer
 
-        blocks = []
-        page_text_parts = []
 
-        for idx, region in enumerate(result):
-            region_type = region.get("type", "text")
-            block_id = f"p{page_num}-b{idx}"
+def _usable_text_layer_pages(
+    layer: dict[int, TextLayerPage], total_pages: int, metrics: dict
+) -> dict[int, TextLayerPage]:
+    """Keep the text-layer pages that can stand in for OCR."""
+    usable = {}
+    rejected: dict[str, int] = {}
+    for page_num, page in layer.items():
+        reason = assess_page(page)
+        if reason is None:
+            usable[page_num] = page
+        else:
+            rejected[reason] = rejected.get(reason, 0) + 1
 
-            if region_type == "table":
-                table_html = region.get("res", {}).get("html", "")
-                table_id = f"t-p{page_num}-{len(all_tables)}"
+    metrics["text_layer_pages"] = len(usable)
+    metrics["text_layer_rejected"] = rejected
+    logger.info(
+        f"Text layer: {len(usable)}/{total_pages} pages usable "
+        f"(OCR needed: {rejected or 'none'})"
+    )
+    return usable
 
-                values = _parse_table_html(table_html)
-                rows_count = len(values)
-                cols_count = max((len(row) for row in values), default=0)
 
-                table_text_lines = []
-                for row in values:
-                    table_text_lines.append(" | ".join(row))
-                table_text = "\n".join(table_text_lines)
-                if table_text:
-                    page_text_parts.append(table_text)
+def _plan_page_dpi(
+    tmp_path: str, total_pages: int, layer: dict[int, TextLayerPage], metrics: dict
+) -> dict[int, int]:
+    """Render DPI for every page — PADDLEOCR_DPI, or chosen per page in adaptive mode."""
+    if RASTER_DPI_MODE == "fixed":
+        return dict.fromkeys(range(1, total_pages + 1), DPI)
 
-                table_entry = {
-                    "table_id": table_id,
-                    "page_number": page_num,
-                    "table_index": len(all_tables),
-                    "rows": rows_count,
-                    "cols": cols_count,
-                    "values": values,
-                    "html": table_html,
-                    "confidence": _avg_confidence(region),
-                    "source_engine": "paddleocr",
-                }
-                all_tables.append(table_entry)
-
-                blocks.append(
-                    {
-                        "block_id": block_id,
-                        "type": "table",
-                        "text": table_text or f"[Table: {rows_count}x{cols_count}]",
-                        "table_id": table_id,
-                        "confidence": table_entry["confidence"],
-                        "bbox": _get_bbox(region),
-                    }
-                )
-            else:
-                text_lines = region.get("res", [])
-                if isinstance(text_lines, list):
-                    text = "\n".join(
-                        line.get("text", str(line))
-                        if isinstance(line, dict)
-                        else str(line)
-                        for line in text_lines
-                    )
-                elif isinstance(text_lines, dict):
-                    text = text_lines.get("text", "")
-                else:
-                    text = str(text_lines)
-
-                page_text_parts.append(text)
-
-                block_type = "paragraph"
-                if region_type == "title":
-                    block_type = "heading"
-                elif region_type == "list":
-                    block_type = "list"
-
-                blocks.append(
-                    {
-                        "block_id": block_id,
-                        "type": block_type,
-                        "text": text,
-                        "confidence": _avg_confidence(region),
-                        "bbox": _get_bbox(region),
-                    }
-                )
+    sizes = {num: (page.width_pt, page.height_pt) for num, page in layer.items()}
+    if len(sizes) < total_pages:
+        try:
+            sizes = read_page_sizes(tmp_path, 1, total_pages) | sizes
+        except (OSError, subprocess.SubprocessError) as err:
+            logger.warning(f"Page sizes unavailable ({err}) — unmeasured pages at {DPI} DPI")
 
-        del result
+    page_dpi = {}
+    for page_num in range(1, total_pages + 1):
+        if page_num not in sizes:
+            page_dpi[page_num] = DPI
+            continue
+        text_page = layer.get(page_num)
+        line_height = text_page.median_line_height() if text_page is not None else None
+        page_dpi[page_num] = _dpi_policy.choose(*sizes[page_num], line_height)
 
-        page_tables = [t for t in all_tables if t["page_number"] == page_num]
+    histogram: dict[str, int] = {}
+    for dpi in sorted(page_dpi.values()):
+        histogram[str(dpi)] = histogram.get(str(dpi), 0) + 1
+    metrics["page_dpi"] = histogram
+    logger.info(f"Adaptive DPI (pages per DPI): {histogram}")
+    return page_dpi
 
-        pages.append(
-            {
+
+def _ocr_pages(
+    tmp_path: str,
+    page_numbers: list[int],
+    total_pages: int,
+    metrics: dict,
+    page_dpi: dict[int, int],
+    profile: str,
+    ticket: Ticket,
+) -> Iterator[dict]:
+    """OCR the given pages with the `profile` engine pass, on the worker pool
+    when configured, else in-thread.
+
+    The ticket's cancel token is checked before each page's OCR; pool
+    chunks not yet started are dropped when the document is cancelled.
+    Pool chunks and in-process pages both take fair scheduler slots, so
+    concurrent documents share the workers or the engine per tenant.
+    """
+    cancel = ticket.cancel
+    if not page_numbers:
+        return
+    assembler = _PageAssembler(total_pages, profile)
+    if profile == "auto":
+        # Filled in as pages are assembled
+        metrics["page_routes"] = assembler.routes
+
+    pool = get_ocr_pool()
+    if pool is not None:
+        logger.info(f"OCR on process pool ({pool.workers} workers)...")
+        metrics.update({"ocr_mode": "process_pool", "ocr_workers": pool.workers})
+        try:
+            records = pool.iter_pages(
+                tmp_path, page_numbers, page_dpi, RASTER_GRAYSCALE, profile, ticket
+            )
+            # Closed on cancellation too, which drops chunks not yet started
+            with closing(records):
+                for record in records:
+                    cancel.check()
+                    STAGE_SECONDS.labels("rasterize").observe(record["raster_ms"] / 1000)
+                    _page_cache.record(record["cache_hit"], record["page_cache_key"])
+                    if record["page_cache_key"] and not record["cache_hit"]:
+                        _page_cache.put(record["page_cache_key"], {"regions": record["regions"]})
+                    yield assembler.build(record)
+        except BrokenProcessPool:
+            # A worker died (usually OOM). Finish this document on the
+            # in-process engine and stop using the pool.
+            logger.exception("OCR process pool broke — falling back to single engine")
+            _disable_ocr_pool()
+        else:
+            return
+
+        # Resume after whatever the pool already delivered
+        page_numbers = [n for n in page_numbers if n > assembler.last_page]
+
+    yield from _ocr_pages_in_process(
+        tmp_path, page_numbers, total_pages, metrics, page_dpi, profile, ticket, assembler
+    )
+
+
+def _ocr_pages_in_process(
+    tmp_path: str,
+    page_numbers: list[int],
+    total_pages: int,
+    metrics: dict,
+    page_dpi: dict[int, int],
+    profile: str,
+    ticket: Ticket,
+    assembler: "_PageAssembler",
+) -> Iterator[dict]:
+    """OCR pages on the in-process engine, one scheduler turn per page."""
+    engine = get_engine()
+    rasterizer = PageRasterizer(
+        tmp_path,
+        total_pages,
+        dpi=DPI,
+        mode=RASTER_MODE,
+        window=RASTER_WINDOW_PAGES,
+        thread_count=RASTER_THREADS,
+        pages=page_numbers,
+        page_dpi=page_dpi,
+        grayscale=RASTER_GRAYSCALE,
+        backend=RASTER_BACKEND,
+        buffers=_page_buffers,
+    )
+    logger.info(
+        f"Rasterizing {len(page_numbers)} pages ({RASTER_DPI_MODE} DPI, "
+        f"{'grayscale' if RASTER_GRAYSCALE else 'RGB'}, {RASTER_MODE}, {RASTER_BACKEND}, "
+        f"window={rasterizer.window}, pipelined={PIPELINE_ENABLED})..."
+    )
+
+    metrics.update(
+        {
+            "ocr_mode": "single",
+            "ocr_workers": 1,
+            "raster_mode": RASTER_MODE,
+            "raster_backend": RASTER_BACKEND,
+            "raster_window_pages": rasterizer.window,
+            "raster_dpi_mode": RASTER_DPI_MODE,
+            "raster_grayscale": RASTER_GRAYSCALE,
+        }
+    )
+    if PIPELINE_ENABLED:
+        # rasterize page N+1 ‖ OCR page N ‖ build blocks for page N-1
+        pipeline = Pipeline(
+            _raster_records(rasterizer),
+            [
+                ("ocr", partial(_ocr_record, engine, profile, ticket)),
+                ("postprocess", assembler.build),
+            ],
+            source_name="rasterize",
+            queue_size=PIPELINE_QUEUE_SIZE,
+        )
+        yield from pipeline
+        metrics["stages"] = pipeline.stats_dict()
+        logger.info(f"Pipeline stages: {metrics['stages']}")
+    else:
+        for record in _raster_records(rasterizer):
+            yield assembler.build(_ocr_record(engine, profile, ticket, record))
+
+    logger.info(f"Rasterization total: {len(page_numbers)} pages in {rasterizer.raster_ms}ms")
+    metrics["raster_ms"] = rasterizer.raster_ms
+
+
+def _raster_records(rasterizer: PageRasterizer) -> Iterator[dict]:
+    """Yield page records carrying the rasterized page as an array."""
+    pages = iter(rasterizer)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                page_num, dpi, img_array = next(pages)
+            except StopIteration:
+                break
+            STAGE_SECONDS.labels("rasterize").observe(time.perf_counter() - start)
+            height, width = img_array.shape[:2]
+            yield {
                 "page_number": page_num,
                 "width": width,
                 "height": height,
-                "text": "\n".join(page_text_parts),
-                "blocks": blocks,
-                "tables": page_tables,
+                "dpi": dpi,
+                "image": img_array,
             }
+            del img_array
+    finally:
+        pages.close()
+
+
+def _ocr_record(engine: PPStructure, profile: str, ticket: Ticket, record: dict) -> dict:
+    """Run the in-process engine's `profile` pass on a page record, replacing
+    its image with regions.
+
+    Pages whose pixels were OCR'd before (same render settings and profile) come from
+    the page cache instead. Waits for the document's scheduler turn before
+    running the engine, and raises Cancelled rather than start a page for a
+    cancelled document.
+    """
+    ticket.cancel.check()
+    ocr_start = time.time()
+    img_array = record.pop("image")
+
+    fingerprint = page_fingerprint(_engine_fingerprint(), profile)
+    key = pixel_key(img_array, fingerprint) if _page_cache.enabled else None
+    cached = _page_cache.get(key) if key else None
+    if cached is not None:
+        record["regions"] = cached["regions"]
+    else:
+        wait_start = time.time()
+        with _scheduler.turn(ticket):
+            # Time spent waiting for the engine isn't OCR time
+            ocr_start += time.time() - wait_start
+            record["regions"] = run_engine(engine, img_array, _page_buffers, profile)
+        if key:
+            _page_cache.put(key, {"regions": record["regions"]})
+    # Nothing else holds the page now; the next page of this shape reuses it
+    _page_buffers.release(img_array)
+    del img_array
+
+    record["cache_hit"] = cached is not None
+    record["ocr_ms"] = int((time.time() - ocr_start) * 1000)
+    return record
+
+
+class _PageAssembler:
+    """Builds response pages from page records, arriving in page order.
+
+    Keeps only counters — pages and tables are handed straight to the
+    caller — so table_index can keep counting across pages without the
+    assembler holding the document. With the auto profile each page also
+    gets the route it took, counted in routes.
+    """
+
+    def __init__(self, total_pages: int, profile: str = DEFAULT_PROFILE):
+        self.total_pages = total_pages
+        self.profile = profile
+        self.last_page = 0
+        self.table_count = 0
+        self.routes = dict.fromkeys(ROUTES, 0)
+
+    def build(self, record: dict) -> dict:
+        page_num = record["page_number"]
+        logger.info(
+            f"Page {page_num}/{self.total_pages}: {len(record['regions'])} regions "
+            f"in {record['ocr_ms']}ms"
         )
+        start = time.perf_counter()
+        page = _build_page(record, self.table_count)
+        STAGE_SECONDS.labels("postprocess").observe(time.perf_counter() - start)
+        self.last_page = page_num
+        self.table_count += len(page["tables"])
+        if self.profile == "auto":
+            page["route"] = page_route(record["regions"])
+            self.routes[page["route"]] += 1
+            PAGE_ROUTES.labels(page["route"]).inc()
 
-        # Periodic GC every 10 pages to keep memory in check
-        if page_num % 10 == 0:
-            gc.collect()
+        if record["cache_hit"]:
+            PAGES.labels("page_cache").inc()
+        else:
+            PAGES.labels("ocr").inc()
+            STAGE_SECONDS.labels("ocr").observe(record["ocr_ms"] / 1000)
+        for region in record["regions"]:
+            REGIONS.labels(region.get("type", "text")).inc()
+        TABLES.inc(len(page["tables"]))
+        return page
 
-    # Final cleanup
-    del all_images
-    gc.collect()
 
-    return {"pages": pages, "tables": all_tables}
+def _build_page(record: dict, table_offset: int) -> dict:
+    """Convert one page's PP-Structure regions into blocks and tables.
 
+    table_offset is the number of tables on earlier pages, so table_index
+    stays document-wide.
+    """
+    page_num = record["page_number"]
+    blocks = []
+    page_text_parts = []
+    page_tables = []
 
-@app.post("/api/extract")
-async def extract(file: UploadFile = File(...), _auth=Depends(verify_api_key)):
+    for idx, region in enumerate(record["regions"]):
+        region_type = region.get("type", "text")
+        block_id = f"p{page_num}-b{idx}"
+
+        if region_type == "table":
+            table_html = region.get("res", {}).get("html", "")
+            table_index = table_offset + len(page_tables)
+            table_id = f"t-p{page_num}-{table_index}"
+
+            values = parse_table_html(table_html)
+            rows_count = len(values)
+            cols_count = max((len(row) for row in values), default=0)
+
+            table_text_lines = []
+            for row in values:
+                table_text_lines.append(" | ".join(row))
+            table_text = "\n".join(table_text_lines)
+            if table_text:
+                page_text_parts.append(table_text)
+
+            table_entry = {
+                "table_id": table_id,
+                "page_number": page_num,
+                "table_index": table_index,
+                "rows": rows_count,
+                "cols": cols_count,
+                "values": values,
+                "html": table_html,
+                "confidence": _avg_confidence(region),
+                "source_engine": "paddleocr",
+            }
+            page_tables.append(table_entry)
+
+            blocks.append(
+                {
+                    "block_id": block_id,
+                    "type": "table",
+                    "text": table_text or f"[Table: {rows_count}x{cols_count}]",
+                    "table_id": table_id,
+                    "confidence": table_entry["confidence"],
+                    "bbox": _get_bbox(region),
+                }
+            )
+        else:
+            text_lines = region.get("res", [])
+            if isinstance(text_lines, list):
+                text = "\n".join(
+                    line.get("text", str(line))
+                    if isinstance(line, dict)
+                    else str(line)
+                    for line in text_lines
+                )
+            elif isinstance(text_lines, dict):
+                text = text_lines.get("text", "")
+            else:
+                text = str(text_lines)
+
+            page_text_parts.append(text)
+
+            block_type = "paragraph"
+            if region_type == "title":
+                block_type = "heading"
+            elif region_type == "list":
+                block_type = "list"
+
+            blocks.append(
+                {
+                    "block_id": block_id,
+                    "type": block_type,
+                    "text": text,
+                    "confidence": _avg_confidence(region),
+                    "bbox": _get_bbox(region),
+                }
+            )
+
+    return {
+        "page_number": page_num,
+        "width": record["width"],
+        "height": record["height"],
+        "dpi": record["dpi"],
+        "text": "\n".join(page_text_parts),
+        "blocks": blocks,
+        "tables": page_tables,
+        "cache_hit": record.get("cache_hit", False),
+        "source": "ocr",
+    }
+
+
+async def _receive_upload(file: UploadFile) -> tuple[str, int, str]:
+    """Validate and spool an upload to a temp file.
+
+    Returns (tmp_path, size_bytes, sha256). The caller owns the temp file.
+    """
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
     start = time.time()
     tmp_path: str | None = None
     content_size = 0
+    hasher = hashlib.sha256()
 
     # Stream upload to temp file in chunks to prevent OOM on large uploads
     try:
         with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
             tmp_path = tmp.name
             while chunk := await file.read(65536):
+                if content_size == 0 and PDF_MAGIC not in chunk[:1024]:
+                    # Refuse at the first chunk rather than after the whole body
+                    REJECTIONS.labels("invalid_pdf").inc()
+                    raise HTTPException(status_code=400, detail="Upload is not a PDF")
                 content_size += len(chunk)
                 if content_size > MAX_FILE_BYTES:
+                    REJECTIONS.labels("file_too_large").inc()
                     raise HTTPException(
                         status_code=413,
                         detail=f"File too large (>{MAX_FILE_BYTES} bytes). Max: {MAX_FILE_BYTES}",
                     )
+                hasher.update(chunk)
                 tmp.write(chunk)
     except HTTPException:
         # Clean up temp file on size limit exceeded
@@ -238,92 +1242,773 @@ async def extract(file: UploadFile = File(...), _auth=Depends(verify_api_key)):
             Path(tmp_path).unlink(missing_ok=True)
         raise
 
+    STAGE_SECONDS.labels("upload").observe(time.time() - start)
+    return tmp_path, content_size, hasher.hexdigest()
+
+
+async def _receive_url(url: str) -> tuple[str, int, str]:
+    """Download a source URL to a temp file, enforcing MAX_FILE_BYTES as it streams.
+
+    Same return and ownership as _receive_upload; counted as the upload stage.
+    """
+    try:
+        check_url(url, SOURCE_URL_ALLOWED_HOSTS)
+    except SourceRejected as err:
+        raise HTTPException(
+            status_code=400, detail=str(err), headers={SOURCE_ERROR_HEADER: "rejected"}
+        ) from None
+
+    start = time.time()
+    tmp_path: str | None = None
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp_path = tmp.name
+            try:
+                content_size, content_sha256 = await download(
+                    _http_client, url, tmp, MAX_FILE_BYTES
+                )
+            except SourceTooLarge:
+                REJECTIONS.labels("file_too_large").inc()
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large (>{MAX_FILE_BYTES} bytes). Max: {MAX_FILE_BYTES}",
+                ) from None
+            except SourceFetchError as err:
+                raise HTTPException(
+                    status_code=502, detail=str(err), headers={SOURCE_ERROR_HEADER: "fetch_failed"}
+                ) from None
+    except BaseException:
+        # Includes the client going away mid-download
+        if tmp_path:
+            Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    STAGE_SECONDS.labels("upload").observe(time.time() - start)
+    return tmp_path, content_size, content_sha256
+
+
+async def _receive_source(
+    file: UploadFile | None, source_url: str | None
+) -> tuple[str, str, int, str]:
+    """Spool the PDF from an upload or a source URL — exactly one of them.
+
+    Returns (filename, tmp_path, size_bytes, sha256). The caller owns the
+    temp file.
+    """
+    if (file is None) == (source_url is None):
+        raise HTTPException(status_code=400, detail="Send exactly one of file or source_url")
+    if file is not None:
+        return (file.filename, *await _receive_upload(file))
+    return (filename_from_url(source_url), *await _receive_url(source_url))
+
+
+async def _count_pages(tmp_path: str) -> int:
+    """Page count via pdfinfo; 413 when over MAX_PAGES, 400 when it isn't a
+    readable PDF.
+
+    Runs on the admission pool, never queued behind OCR.
+    """
+    loop = asyncio.get_running_loop()
+    start = time.time()
     try:
-        loop = asyncio.get_running_loop()
         info = await loop.run_in_executor(
-            _executor, partial(pdfinfo_from_path, tmp_path)
+            _admission_executor,
+            partial(pdfinfo_from_path, tmp_path, timeout=PDFINFO_TIMEOUT_S),
         )
-        total_pages = info.get("Pages", 0)
-        if total_pages > MAX_PAGES:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Too many pages ({total_pages}). Max: {MAX_PAGES}",
+    except (PDFPageCountError, PDFPopplerTimeoutError) as err:
+        REJECTIONS.labels("invalid_pdf").inc()
+        raise HTTPException(status_code=400, detail=f"Unreadable PDF: {err}") from None
+    finally:
+        STAGE_SECONDS.labels("pdfinfo").observe(time.time() - start)
+    total_pages = info.get("Pages", 0)
+    if total_pages > MAX_PAGES:
+        REJECTIONS.labels("too_many_pages").inc()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many pages ({total_pages}). Max: {MAX_PAGES}",
+        )
+    return total_pages
+
+
+async def _run_document(ticket: Ticket, fn: Callable[[], object]):
+    """Run one document's blocking work on the OCR executor once _documents
+    admits it; the slot is held until fn returns on its thread."""
+    await _documents.acquire(ticket)
+    return await _submit_document(asyncio.get_running_loop(), ticket, fn)
+
+
+def _submit_document(
+    loop: asyncio.AbstractEventLoop, ticket: Ticket, fn: Callable[[], object]
+) -> asyncio.Future:
+    """Start an admitted document's fn on _executor; the slot goes back once it returns."""
+    global _executor_queued
+    with _executor_queued_lock:
+        _executor_queued += 1
+    try:
+        return loop.run_in_executor(_executor, partial(_in_document_slot, loop, ticket, fn))
+    except BaseException:
+        with _executor_queued_lock:
+            _executor_queued -= 1
+        _documents.release(ticket)
+        raise
+
+
+def _in_document_slot(loop: asyncio.AbstractEventLoop, ticket: Ticket, fn: Callable[[], object]):
+    global _executor_queued
+    with _executor_queued_lock:
+        _executor_queued -= 1
+    try:
+        return fn()
+    finally:
+        loop.call_soon_threadsafe(_documents.release, ticket)
+
+
+async def _iterate_in_executor(
+    make_iter: Callable[[], Iterator],
+    ticket: Ticket,
+    max_buffered: int = 4,
+    cancel: CancelToken | None = None,
+):
+    """Drive a blocking iterator on the OCR executor, once _documents admits
+    `ticket`, and yield its items here.
+
+    At most max_buffered items wait for the consumer; beyond that the
+    producer thread pauses. If the consumer stops early (client went away),
+    `cancel` is cancelled so the iterator stops at its next page check, and
+    the producer closes it at the next item boundary and frees the executor.
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(max_buffered)
+    stop = threading.Event()
+
+    def produce() -> None:
+        it = make_iter()
+        try:
+            for item in it:
+                while not slots.acquire(timeout=0.5):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                loop.call_soon_threadsafe(items.put_nowait, (True, item))
+        except BaseException as err:
+            loop.call_soon_threadsafe(items.put_nowait, (False, err))
+            return
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+        loop.call_soon_threadsafe(items.put_nowait, (False, None))
+
+    await _documents.acquire(ticket)
+    _submit_document(loop, ticket, produce)
+    finished = False
+    try:
+        while True:
+            ok, item = await items.get()
+            if not ok:
+                finished = True
+                if item is not None:
+                    raise item
+                return
+            slots.release()
+            yield item
+    finally:
+        if not finished and cancel is not None:
+            cancel.cancel(CLIENT_DISCONNECT)
+        stop.set()
+
+
+async def _watch_disconnect(
+    request: Request, cancel: CancelToken, interval_s: float = 1.0
+) -> None:
+    """Cancel the token once the client has gone away. Run as a task and
+    cancel it when the request is done."""
+    while not cancel.cancelled:
+        if await request.is_disconnected():
+            logger.info("Client disconnected — cancelling extraction")
+            cancel.cancel(CLIENT_DISCONNECT)
+            return
+        await asyncio.sleep(interval_s)
+
+
+@app.post("/api/extract")
+async def extract(
+    request: Request,
+    file: UploadFile | None = File(None),
+    source_url: str | None = Form(None),
+    options: ExtractOptions = Depends(_extract_options),
+    response_options: ResponseOptions = Depends(_response_options),
+    cancel: CancelToken = Depends(_cancel_token),
+    tenant: str = Depends(_tenant),
+    _auth=Depends(verify_api_key),
+):
+    """Extract a PDF, uploaded as `file` or fetched from `source_url`.
+
+    A request for the same bytes and options as one already in flight waits
+    for that extraction and shares its result (coalesced: true) instead of
+    running OCR again.
+    """
+    start = time.time()
+    filename, tmp_path, content_size, content_sha256 = await _receive_source(file, source_url)
+    cache_key = _result_cache_key(content_sha256, options)
+
+    try:
+        cached = await asyncio.to_thread(_result_cache.get, cache_key)
+        if cached is not None:
+            processing_time_ms = int((time.time() - start) * 1000)
+            logger.info(f"Result cache hit: {filename} ({content_sha256[:12]})")
+            return await _result_response(
+                request, response_options, cached, content_sha256, processing_time_ms, cached=True
             )
 
-        logger.info(
-            f"Starting extraction: {file.filename} ({content_size} bytes, {total_pages} pages)"
+        flight = _flights.get(cache_key)
+        coalesced = flight is not None
+        if coalesced:
+            # The flight reads its own copy of these bytes
+            logger.info(f"Coalescing {filename} onto in-flight {content_sha256[:12]}")
+            COALESCED_REQUESTS.inc()
+            Path(tmp_path).unlink(missing_ok=True)
+        else:
+            logger.info(f"Starting extraction: {filename} ({content_size} bytes)")
+            flight = _flights.start(
+                cache_key,
+                partial(_extract_document, tmp_path, options, cache_key, filename, tenant),
+            )
+        # The flight owns (and deletes) the leader's temp file from here on
+        tmp_path = None
+
+        watcher = asyncio.create_task(_watch_disconnect(request, cancel))
+        try:
+            result = await _flights.wait(flight, cancel)
+        except Cancelled as err:
+            raise _cancelled_error(err) from None
+        finally:
+            watcher.cancel()
+
+        processing_time_ms = int((time.time() - start) * 1000)
+        return await _result_response(
+            request,
+            response_options,
+            result,
+            content_sha256,
+            processing_time_ms,
+            cached=False,
+            metrics=result["metrics"],
+            coalesced=coalesced,
         )
 
-        # Run CPU-bound OCR in thread pool — event loop stays free for health checks
-        result = await loop.run_in_executor(
-            _executor, partial(_process_pdf_sync, tmp_path, total_pages)
+    finally:
+        if tmp_path is not None:
+            Path(tmp_path).unlink(missing_ok=True)
+
+
+async def _extract_document(
+    tmp_path: str,
+    options: ExtractOptions,
+    cache_key: str,
+    filename: str,
+    tenant: str,
+    cancel: CancelToken,
+) -> dict:
+    """One /api/extract computation, shared by every request coalesced onto it.
+
+    Owns tmp_path. The returned dict is shared between the waiting requests
+    and must not be modified. Scheduled as the tenant of the request that
+    started it.
+    """
+    start = time.time()
+    try:
+        total_pages = await _count_pages(tmp_path)
+        logger.info(f"{filename}: {total_pages} pages (tenant {tenant})")
+        result = None
+        if COORDINATOR_PEERS and total_pages >= COORDINATOR_MIN_PAGES:
+            result = await _fan_out(tmp_path, total_pages, options, tenant, cancel)
+        if result is None:
+            ticket = Ticket(tenant, total_pages, cancel)
+            # Run CPU-bound OCR in thread pool — event loop stays free for health checks
+            try:
+                result = await _run_document(
+                    ticket, partial(_process_pdf_sync, tmp_path, total_pages, options, ticket)
+                )
+            except RenderError as err:
+                raise HTTPException(
+                    status_code=422, detail=f"Could not render PDF: {err}"
+                ) from None
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+    logger.info(
+        f"Extraction complete: {filename} in {int((time.time() - start) * 1000)}ms "
+        f"({len(result['pages'])} pages, {len(result['tables'])} tables)"
+    )
+    await asyncio.to_thread(
+        _result_cache.put, cache_key, {"pages": result["pages"], "tables": result["tables"]}
+    )
+    return result
+
+
+async def _fan_out(
+    tmp_path: str,
+    total_pages: int,
+    options: ExtractOptions,
+    tenant: str,
+    cancel: CancelToken,
+) -> dict | None:
+    """Extract a document as page-range shards on COORDINATOR_PEERS.
+
+    Same result shape as _process_pdf_sync, or None when the PDF can't be
+    split (the caller extracts it locally). 502 once a shard has failed on
+    every peer it was tried on.
+    """
+    shards = split_ranges(total_pages, COORDINATOR_SHARD_PAGES, len(COORDINATOR_PEERS))
+    params = {"mode": options.mode}
+    features = features_for(options.profile)
+    if features:
+        params["features"] = ",".join(sorted(features))
+    headers = {"X-Tenant-Id": tenant}
+    if PADDLEOCR_API_KEY:
+        headers["X-API-Key"] = PADDLEOCR_API_KEY
+
+    async def send(peer: str, shard: Shard) -> dict:
+        start = time.time()
+        payload = await send_shard(
+            _http_client, peer, shard, params, headers, COORDINATOR_SHARD_TIMEOUT_S
         )
+        STAGE_SECONDS.labels("shard").observe(time.time() - start)
+        return payload
 
-        processing_time_ms = int((time.time() - start) * 1000)
+    with tempfile.TemporaryDirectory(prefix="shards-") as workdir:
+        start = time.time()
+        try:
+            await asyncio.to_thread(split_pdf, tmp_path, shards, workdir)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as err:
+            logger.warning(f"Could not split into shards, extracting locally: {err}")
+            return None
+        split_ms = int((time.time() - start) * 1000)
+        STAGE_SECONDS.labels("split").observe(split_ms / 1000)
         logger.info(
-            f"Extraction complete: {file.filename} in {processing_time_ms}ms "
-            f"({len(result['pages'])} pages, {len(result['tables'])} tables)"
+            f"Fanning {total_pages} pages out as {len(shards)} shards "
+            f"to {len(COORDINATOR_PEERS)} peers (split in {split_ms}ms)"
         )
+        try:
+            await run_shards(shards, COORDINATOR_PEERS, send, COORDINATOR_SHARD_ATTEMPTS, cancel)
+        except ShardFailed as err:
+            raise HTTPException(status_code=502, detail=str(err)) from None
 
-        return JSONResponse(
+    result = merge_shards(shards)
+    result["metrics"] = {
+        "engine_profile": options.profile,
+        "split_ms": split_ms,
+        "shards": [
             {
-                "document_id": str(uuid.uuid4()),
-                "page_count": len(result["pages"]),
-                "pages": result["pages"],
-                "tables": result["tables"],
-                "processing_time_ms": processing_time_ms,
-                "engine_version": "paddleocr-pp-structure-2.9.1",
+                "first_page": shard.first_page,
+                "last_page": shard.last_page,
+                "peer": shard.peers[-1],
+                "attempts": len(shard.peers),
+                "processing_time_ms": shard.result["processing_time_ms"],
+                "cached": shard.result["cached"],
             }
+            for shard in shards
+        ],
+    }
+    return result
+
+
+@app.post("/api/extract/batch")
+async def extract_batch(
+    request: Request,
+    files: list[UploadFile] = File([]),
+    source_urls: list[str] = Form([]),
+    options: ExtractOptions = Depends(_extract_options),
+    response_options: ResponseOptions = Depends(_response_options),
+    cancel: CancelToken = Depends(_cancel_token),
+    tenant: str = Depends(_tenant),
+    _auth=Depends(verify_api_key),
+):
+    """Extract several PDFs from one multipart request: repeated "files"
+    parts, repeated "source_urls" fields to fetch, or both.
+
+    Streams NDJSON, one record per document in the order they finish:
+      {"type": "batch", batch_id, document_count}
+      {"type": "document", index, filename, status: "ok", ...same payload as /api/extract}
+      {"type": "document", index, filename, status: "error", status_code, detail}
+      {"type": "summary", batch_id, succeeded, failed, page_count, processing_time_ms,
+       pages_per_second}
+    A document that fails (not a PDF, too large, too many pages, OCR error)
+    gets an error record; the rest of the batch carries on. With an OCR
+    worker pool, up to OCR_WORKERS documents share the pool at once, so
+    their pages are OCR'd side by side; otherwise the batch runs one
+    document at a time, leaving the engine's other turns to other requests.
+    Each document still uses the result cache and joins
+    an identical extraction already in flight.
+    """
+    sources = [(file.filename, partial(_receive_upload, file)) for file in files]
+    for url in source_urls:
+        # Rejected URLs fail the request up front rather than one document
+        try:
+            check_url(url, SOURCE_URL_ALLOWED_HOSTS)
+        except SourceRejected as err:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{url}: {err}",
+                headers={SOURCE_ERROR_HEADER: "rejected"},
+            ) from None
+        sources.append((filename_from_url(url), partial(_receive_url, url)))
+    if not sources:
+        raise HTTPException(status_code=400, detail="Send at least one file or source_urls entry")
+    if len(sources) > MAX_BATCH_FILES:
+        REJECTIONS.labels("too_many_files").inc()
+        raise HTTPException(
+            status_code=413, detail=f"Too many files ({len(sources)}). Max: {MAX_BATCH_FILES}"
         )
+    start = time.time()
+    batch_id = str(uuid.uuid4())
+    logger.info(f"Starting batch {batch_id}: {len(sources)} documents")
 
+    pool = get_ocr_pool()
+    slots = asyncio.Semaphore(pool.workers if pool is not None else 1)
+
+    async def run_document(index: int, filename: str, receive: Callable) -> dict:
+        record = {"type": "document", "index": index, "filename": filename}
+        try:
+            payload = await _batch_document(receive, filename, options, tenant, cancel, slots)
+        except Cancelled as err:
+            error = _cancelled_error(err)
+        except HTTPException as err:
+            error = err
+        except Exception as err:
+            logger.exception(f"Batch {batch_id}: {filename} failed")
+            error = HTTPException(status_code=500, detail=str(err))
+        else:
+            return {**record, "status": "ok", **select_fields(payload, response_options.omit)}
+        record.update(status="error", status_code=error.status_code, detail=error.detail)
+        return record
+
+    async def records():
+        tasks = [
+            asyncio.create_task(run_document(index, filename, receive))
+            for index, (filename, receive) in enumerate(sources)
+        ]
+        succeeded = failed = page_count = 0
+        finished = False
+        try:
+            header = {"type": "batch", "batch_id": batch_id, "document_count": len(sources)}
+            yield dumps(header) + b"\n"
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                if record["status"] == "ok":
+                    succeeded += 1
+                    page_count += record["page_count"]
+                else:
+                    failed += 1
+                yield await asyncio.to_thread(dumps, record) + b"\n"
+
+            elapsed = time.time() - start
+            pages_per_second = round(page_count / elapsed, 2) if elapsed > 0 else None
+            logger.info(
+                f"Batch {batch_id} complete in {int(elapsed * 1000)}ms: {succeeded} ok, "
+                f"{failed} failed, {page_count} pages ({pages_per_second} pages/s)"
+            )
+            finished = True
+            yield dumps(
+                {
+                    "type": "summary",
+                    "batch_id": batch_id,
+                    "succeeded": succeeded,
+                    "failed": failed,
+                    "page_count": page_count,
+                    "processing_time_ms": int(elapsed * 1000),
+                    "pages_per_second": pages_per_second,
+                }
+            ) + b"\n"
+        finally:
+            if not finished:
+                cancel.cancel(CLIENT_DISCONNECT)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    return StreamingResponse(
+        records(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _batch_document(
+    receive: Callable[[], Awaitable[tuple[str, int, str]]],
+    filename: str,
+    options: ExtractOptions,
+    tenant: str,
+    cancel: CancelToken,
+    slots: asyncio.Semaphore,
+) -> dict:
+    """One batch document's result payload; HTTPException for per-document failures."""
+    start = time.time()
+    tmp_path, _content_size, content_sha256 = await receive()
+    cache_key = _result_cache_key(content_sha256, options)
+    try:
+        cached = await asyncio.to_thread(_result_cache.get, cache_key)
+        if cached is not None:
+            processing_time_ms = int((time.time() - start) * 1000)
+            return _result_payload(cached, content_sha256, processing_time_ms, cached=True)
+
+        async with slots:
+            flight = _flights.get(cache_key)
+            coalesced = flight is not None
+            if coalesced:
+                COALESCED_REQUESTS.inc()
+                Path(tmp_path).unlink(missing_ok=True)
+            else:
+                flight = _flights.start(
+                    cache_key,
+                    partial(_extract_document, tmp_path, options, cache_key, filename, tenant),
+                )
+            tmp_path = None
+            result = await _flights.wait(flight, cancel)
     finally:
-        if tmp_path:
+        if tmp_path is not None:
             Path(tmp_path).unlink(missing_ok=True)
-        gc.collect()
 
+    processing_time_ms = int((time.time() - start) * 1000)
+    return _result_payload(
+        result,
+        content_sha256,
+        processing_time_ms,
+        cached=False,
+        metrics=result["metrics"],
+        coalesced=coalesced,
+    )
 
-def _parse_table_html(table_html: str) -> list[list[str]]:
-    """Parse PP-Structure HTML table into a grid of cell text values.
 
-    PP-Structure returns tables as HTML like:
-      <table><thead><tr><td>H1</td><td>H2</td></tr></thead>
-      <tbody><tr><td>V1</td><td>V2</td></tr></tbody></table>
+@app.post("/api/extract/stream")
+async def extract_stream(
+    request: Request,
+    file: UploadFile | None = File(None),
+    source_url: str | None = Form(None),
+    options: ExtractOptions = Depends(_extract_options),
+    response_options: ResponseOptions = Depends(_response_options),
+    cancel: CancelToken = Depends(_cancel_token),
+    tenant: str = Depends(_tenant),
+    _auth=Depends(verify_api_key),
+):
+    """Streaming variant of /api/extract — one record per page as it finishes.
 
-    Returns a list of rows, each row a list of cell text strings.
+    Emits NDJSON by default, or Server-Sent Events when the client sends
+    Accept: text/event-stream. Records, in order:
+      {"type": "document", document_id, page_count, content_sha256, engine_version}
+      {"type": "page", page_number, width, height, text, blocks, tables}  × page_count
+      {"type": "summary", document_id, page_count, table_count, processing_time_ms, ...}
+    Failures after the stream has started arrive as {"type": "error", "detail"},
+    including an X-Request-Timeout-Ms deadline passing mid-document. A client
+    that disconnects stops the extraction at the next page boundary.
+
+    Pages are not accumulated server-side, so streamed extractions are served
+    from the result cache but do not populate it. include=/exclude= apply to
+    each page record; the stream itself is never compressed, so records are
+    delivered as soon as they are written.
     """
-    if not table_html:
-        return []
+    start = time.time()
+    filename, tmp_path, content_size, content_sha256 = await _receive_source(file, source_url)
+    try:
+        cached = await asyncio.to_thread(
+            _result_cache.get, _result_cache_key(content_sha256, options)
+        )
+        total_pages = len(cached["pages"]) if cached is not None else await _count_pages(tmp_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
 
-    rows: list[list[str]] = []
-    current_row: list[str] = []
-    in_cell = False
-    cell_text = ""
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    document_id = str(uuid.uuid4())
+    logger.info(
+        f"Starting streamed extraction: {filename} ({content_size} bytes, "
+        f"{total_pages} pages{', cached' if cached is not None else ''})"
+    )
 
-    # Simple state-machine parser — avoids external dependency
-    # Split on tags, process each
-    parts = re.split(r"(<[^>]+>)", table_html)
+    omit = response_options.omit
 
-    for part in parts:
-        if not part:
-            continue
+    def encode(record: dict) -> bytes:
+        data = dumps(record)
+        if use_sse:
+            return f"event: {record['type']}\ndata: ".encode("utf-8") + data + b"\n\n"
+        return data + b"\n"
+
+    async def records():
+        metrics: dict = {}
+        table_count = 0
+        try:
+            yield encode(
+                {
+                    "type": "document",
+                    "document_id": document_id,
+                    "page_count": total_pages,
+                    "content_sha256": content_sha256,
+                    "engine_version": ENGINE_VERSION,
+                    "cached": cached is not None,
+                }
+            )
+
+            if cached is not None:
+                pages = _aiter(cached["pages"])
+            else:
+                ticket = Ticket(tenant, total_pages, cancel)
+                pages = _iterate_in_executor(
+                    partial(_iter_pdf_pages, tmp_path, total_pages, metrics, options, ticket),
+                    ticket,
+                    cancel=cancel,
+                )
+            async with aclosing(pages):
+                async for page in pages:
+                    table_count += len(page["tables"])
+                    yield encode({"type": "page", **select_page_fields(page, omit)})
+
+            processing_time_ms = int((time.time() - start) * 1000)
+            logger.info(
+                f"Streamed extraction complete: {filename} in {processing_time_ms}ms "
+                f"({total_pages} pages, {table_count} tables)"
+            )
+            summary = {
+                "type": "summary",
+                "document_id": document_id,
+                "page_count": total_pages,
+                "table_count": table_count,
+                "processing_time_ms": processing_time_ms,
+                "engine_version": ENGINE_VERSION,
+            }
+            if "metrics" not in omit:
+                summary["metrics"] = metrics
+            yield encode(summary)
+        except Cancelled as err:
+            logger.info(f"Streamed extraction stopped: {filename} ({err.reason})")
+            yield encode({"type": "error", "detail": _cancelled_error(err).detail})
+        except Exception as err:
+            logger.exception(f"Streamed extraction failed: {filename}")
+            yield encode({"type": "error", "detail": str(err)})
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+
+    return StreamingResponse(
+        records(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _aiter(items: Iterable):
+    for item in items:
+        yield item
+
+
+async def _run_job(job: Job) -> dict:
+    """JobManager runner: OCR the job's PDF, tracking per-page progress."""
+    start = time.time()
+    metrics: dict = {}
+    pages = []
+    ticket = Ticket(job.tenant, job.total_pages)
+    pages_iter = _iterate_in_executor(
+        partial(_iter_pdf_pages, job.tmp_path, job.total_pages, metrics, job.options, ticket),
+        ticket,
+    )
+    async with aclosing(pages_iter):
+        async for page in pages_iter:
+            pages.append(page)
+            job.pages_done += 1
+
+    result = {"pages": pages, "tables": [t for page in pages for t in page["tables"]]}
+    await asyncio.to_thread(
+        _result_cache.put, _result_cache_key(job.content_sha256, job.options), result
+    )
+
+    processing_time_ms = int((time.time() - start) * 1000)
+    return _result_payload(result, job.content_sha256, processing_time_ms, False, metrics)
 
-        lower = part.lower().strip()
-
-        if lower.startswith("<tr"):
-            current_row = []
-        elif lower == "</tr>":
-            if current_row:
-                rows.append(current_row)
-        elif lower.startswith("<td") or lower.startswith("<th"):
-            in_cell = True
-            cell_text = ""
-        elif lower in ("</td>", "</th>"):
-            in_cell = False
-            current_row.append(html_module.unescape(cell_text).strip())
-        elif in_cell and not lower.startswith("<"):
-            cell_text += part
-
-    return rows
+
+_jobs = JobManager(_run_job, max_queued=JOB_QUEUE_SIZE, result_ttl_s=JOB_RESULT_TTL_SECONDS)
+JOB_QUEUE_DEPTH.set_function(lambda: _jobs.stats()["queued"])
+
+
+def _job_status(job: Job) -> dict:
+    return {
+        **job.status_dict(),
+        "queue_position": _jobs.queue_position(job),
+        "status_url": f"/api/jobs/{job.id}",
+        "result_url": f"/api/jobs/{job.id}/result",
+    }
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(
+    file: UploadFile | None = File(None),
+    source_url: str | None = Form(None),
+    options: ExtractOptions = Depends(_extract_options),
+    tenant: str = Depends(_tenant),
+    _auth=Depends(verify_api_key),
+):
+    """Queue an extraction and return immediately with a job id to poll."""
+    filename, tmp_path, content_size, content_sha256 = await _receive_source(file, source_url)
+    try:
+        cached = await asyncio.to_thread(
+            _result_cache.get, _result_cache_key(content_sha256, options)
+        )
+        if cached is not None:
+            job = Job(
+                filename, tmp_path, content_sha256, len(cached["pages"]), options, tenant
+            )
+            _jobs.add_finished(job, _result_payload(cached, content_sha256, 0, cached=True))
+            return _job_status(job)
+
+        total_pages = await _count_pages(tmp_path)
+        job = _jobs.submit(
+            Job(filename, tmp_path, content_sha256, total_pages, options, tenant)
+        )
+    except JobQueueFull as err:
+        Path(tmp_path).unlink(missing_ok=True)
+        REJECTIONS.labels("queue_full").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="OCR queue is full, try again later",
+            headers={"Retry-After": str(err.retry_after_s)},
+        ) from None
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return _job_status(job)
+
+
+def _find_job(job_id: str) -> Job:
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, _auth=Depends(verify_api_key)):
+    return _job_status(_find_job(job_id))
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    request: Request,
+    response_options: ResponseOptions = Depends(_response_options),
+    _auth=Depends(verify_api_key),
+):
+    """The finished job's payload — same shape as /api/extract.
+
+    409 while the job is still queued or running; 500 carrying the error if
+    it failed.
+    """
+    job = _find_job(job_id)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.result is None:
+        raise HTTPException(status_code=500, detail=job.error or "Job failed")
+    return await _encoded_response(job.result, request, response_options)
 
 
 def _avg_confidence(region: dict) -> float:
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/bench_engine_profiles.py
+# Per-page cost of each engine profile (full, layout_text, text, layout,
+# auto).
+#
+# Loads one PP-Structure engine with the service's ENGINE_OPTIONS,
+# rasterizes the PDF once, warms every profile on the first page, then runs
+# every page through each profile in turn (rotating the order per repeat so
+# no profile always goes first on a warm cache). Reported per profile:
+#   ms/page        median engine time per page
+#   p90_ms         90th percentile
+#   regions/page   mean regions returned
+#   chars/page     mean recognized characters — what a cheaper pass gives up
+#   tables         table regions with recognized structure
+# plus, for auto, how many pages took each route — its cost sits between
+# full and layout_text depending on the share of table pages.
+#
+# Usage (from services/paddleocr-service, paddleocr + poppler installed):
+#   python benchmarks/bench_engine_profiles.py guide.pdf
+#   python benchmarks/bench_engine_profiles.py guide.pdf --pages 10 --dpi 200 --repeat 3
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from paddleocr import PPStructure  # noqa: E402
+from pdf2image import pdfinfo_from_path  # noqa: E402
+
+from engine_profiles import PROFILES, ROUTES, page_route  # noqa: E402
+from ocr_pool import run_engine  # noqa: E402
+from raster import PageRasterizer  # noqa: E402
+from tables import parse_table_html  # noqa: E402
+
+# Same constructor options as the service (importing app would start it up)
+ENGINE_OPTIONS = {"lang": "en", "recovery": False}
+
+
+def _chars(regions: list[dict]) -> int:
+    total = 0
+    for region in regions:
+        res = region["res"]
+        if isinstance(res, dict):
+            total += sum(len(cell) for row in parse_table_html(res.get("html", "")) for cell in row)
+        else:
+            total += sum(len(line.get("text", "")) for line in res if isinstance(line, dict))
+    return total
+
+
+def _has_table(region: dict) -> bool:
+    res = region["res"]
+    return region["type"] == "table" and isinstance(res, dict) and bool(res.get("html"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-page cost of each engine profile")
+    parser.add_argument("pdf")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--pages", type=int, default=0, help="first N pages (default: all)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    args = parser.parse_args()
+
+    total_pages = args.pages or pdfinfo_from_path(args.pdf)["Pages"]
+    profiles = args.profiles.split(",")
+    pages = [img for _, _, img in PageRasterizer(args.pdf, total_pages, dpi=args.dpi)]
+
+    start = time.perf_counter()
+    engine = PPStructure(show_log=False, **ENGINE_OPTIONS)
+    elapsed = time.perf_counter() - start
+    print(f"Engine loaded in {elapsed:.1f}s; {len(pages)} pages at {args.dpi} DPI")
+    for profile in profiles:
+        run_engine(engine, pages[0], profile=profile)
+
+    times: dict[str, list[float]] = {profile: [] for profile in profiles}
+    regions: dict[str, list[int]] = {profile: [] for profile in profiles}
+    chars: dict[str, list[int]] = {profile: [] for profile in profiles}
+    tables: dict[str, int] = dict.fromkeys(profiles, 0)
+    routes = dict.fromkeys(ROUTES, 0)
+    for attempt in range(args.repeat):
+        order = profiles[attempt % len(profiles) :] + profiles[: attempt % len(profiles)]
+        for profile in order:
+            for img_array in pages:
+                start = time.perf_counter()
+                result = run_engine(engine, img_array, profile=profile)
+                times[profile].append((time.perf_counter() - start) * 1000)
+                if attempt == 0:
+                    regions[profile].append(len(result))
+                    chars[profile].append(_chars(result))
+                    tables[profile] += sum(1 for region in result if _has_table(region))
+                    if profile == "auto":
+                        routes[page_route(result)] += 1
+
+    full_ms = statistics.median(times["full"]) if "full" in times else None
+    print(
+        f"{'profile':<12} {'ms/page':>8} {'p90_ms':>7} {'vs_full':>7} "
+        f"{'regions/page':>12} {'chars/page':>10} {'tables':>6}"
+    )
+    for profile in profiles:
+        median = statistics.median(times[profile])
+        p90 = median
+        if len(times[profile]) > 1:
+            p90 = statistics.quantiles(times[profile], n=10)[-1]
+        ratio = f"{median / full_ms:.2f}x" if full_ms else "-"
+        print(
+            f"{profile:<12} {median:>8.0f} {p90:>7.0f} {ratio:>7} "
+            f"{statistics.mean(regions[profile]):>12.1f} {statistics.mean(chars[profile]):>10.0f} "
+            f"{tables[profile]:>6}"
+        )
+    if "auto" in profiles:
+        print("auto routes: " + ", ".join(f"{route} {n}" for route, n in routes.items()))
+
+
+if __name__ == "__main__":
+    main()
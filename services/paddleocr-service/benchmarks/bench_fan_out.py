@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/bench_fan_out.py
+# One large document: a single replica vs a coordinator fanning it out.
+#
+# Starts --peers local replicas (`uvicorn app:app`, one OCR worker each,
+# result and page caches off so every run OCRs) on --port+1.., plus a
+# coordinator on --port with COORDINATOR_PEERS pointing at them. Then, per
+# repeat, extracts the PDF once straight from the first peer and once
+# through the coordinator, and reports wall time for each. The fanned-out
+# result is checked against the single-replica one: same page numbers,
+# table_index/table_id sequence and page text.
+#
+# With --kill-peer the last peer is stopped before a final coordinator run,
+# so its shards have to be retried on the others.
+#
+# Usage (from services/paddleocr-service):
+#   python benchmarks/bench_fan_out.py guide.pdf
+#   python benchmarks/bench_fan_out.py guide.pdf --peers 4 --shard-pages 5 --kill-peer
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from measure_rss import SERVICE_DIR, wait_ready  # noqa: E402
+
+
+def start_server(port: int, **env) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+        cwd=SERVICE_DIR,
+        env=dict(
+            os.environ,
+            OCR_WORKERS="1",
+            PAGE_CACHE_MAX_BYTES="0",
+            RESULT_CACHE_MAX_BYTES="0",
+            **env,
+        ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def extract(base_url: str, pdf: str) -> tuple[float, dict]:
+    boundary = uuid.uuid4().hex
+    with open(pdf, "rb") as f:
+        content = f.read()
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{os.path.basename(pdf)}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        f"{base_url}/api/extract",
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    if os.environ.get("PADDLEOCR_API_KEY"):
+        request.add_header("x-api-key", os.environ["PADDLEOCR_API_KEY"])
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=1800) as resp:
+        payload = json.loads(resp.read())
+    return time.perf_counter() - start, payload
+
+
+def differences(single: dict, fanned: dict) -> list[str]:
+    problems = []
+    if [p["page_number"] for p in fanned["pages"]] != [p["page_number"] for p in single["pages"]]:
+        problems.append("page numbers differ")
+    ids = [(t["page_number"], t["table_index"], t["table_id"]) for t in fanned["tables"]]
+    if ids != [(t["page_number"], t["table_index"], t["table_id"]) for t in single["tables"]]:
+        problems.append("table numbering differs")
+    block_ids = {b.get("table_id") for p in fanned["pages"] for b in p["blocks"]} - {None}
+    if block_ids != {t["table_id"] for t in fanned["tables"]}:
+        problems.append("block table_id references don't match tables")
+    texts = sum(a["text"] != b["text"] for a, b in zip(single["pages"], fanned["pages"]))
+    if texts:
+        problems.append(f"{texts} pages with different text")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Single replica vs fan-out across peers")
+    parser.add_argument("pdf")
+    parser.add_argument("--peers", type=int, default=3)
+    parser.add_argument("--shard-pages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--kill-peer", action="store_true", help="stop one peer, run again")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for /ready")
+    args = parser.parse_args()
+
+    peer_urls = [f"http://127.0.0.1:{args.port + n}" for n in range(1, args.peers + 1)]
+    servers = [start_server(args.port + n) for n in range(1, args.peers + 1)]
+    coordinator_url = f"http://127.0.0.1:{args.port}"
+    servers.append(
+        start_server(
+            args.port,
+            COORDINATOR_PEERS=",".join(peer_urls),
+            COORDINATOR_SHARD_PAGES=str(args.shard_pages),
+            COORDINATOR_MIN_PAGES=str(args.shard_pages + 1),
+            # The coordinator only splits and merges
+            WARMUP_ENABLED="0",
+        )
+    )
+    try:
+        for url, server in zip([*peer_urls, coordinator_url], servers):
+            wait_ready(url, server, args.timeout)
+
+        single_s, fanned_s = [], []
+        for _ in range(args.repeat):
+            elapsed, single = extract(peer_urls[0], args.pdf)
+            single_s.append(elapsed)
+            elapsed, fanned = extract(coordinator_url, args.pdf)
+            fanned_s.append(elapsed)
+            problems = differences(single, fanned)
+            if problems:
+                print("MISMATCH: " + "; ".join(problems))
+
+        pages = single["page_count"]
+        shards = fanned["metrics"].get("shards", [])
+        print(f"{pages} pages, {len(shards)} shards over {args.peers} peers")
+        print(f"{'run':<12} {'seconds':>8} {'s/page':>7}")
+        for name, times in (("single", single_s), ("fanned_out", fanned_s)):
+            median = statistics.median(times)
+            print(f"{name:<12} {median:>8.1f} {median / pages:>7.2f}")
+        print(f"speedup {statistics.median(single_s) / statistics.median(fanned_s):.2f}x")
+        for shard in shards:
+            print(
+                f"  pages {shard['first_page']}-{shard['last_page']} on {shard['peer']} "
+                f"({shard['attempts']} attempt(s), {shard['processing_time_ms']}ms)"
+            )
+
+        if args.kill_peer and args.peers > 1:
+            servers[args.peers - 1].terminate()
+            servers[args.peers - 1].wait(timeout=30)
+            elapsed, retried = extract(coordinator_url, args.pdf)
+            retries = sum(shard["attempts"] - 1 for shard in retried["metrics"]["shards"])
+            problems = differences(single, retried)
+            print(
+                f"with {peer_urls[-1]} stopped: {elapsed:.1f}s, {retries} shard retries, "
+                + ("MISMATCH: " + "; ".join(problems) if problems else "result matches")
+            )
+    finally:
+        for server in servers:
+            if server.poll() is None:
+                server.terminate()
+                server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/bench_raster.py
+# Raster backend microbenchmark: pdf2image (PPM files → PIL → NumPy) vs pnm
+# (pdftoppm stdout → NumPy).
+#
+# Each backend runs in a fresh interpreter so one run's heap and RSS high
+# water don't bleed into the next. Reported per backend:
+#   pages/s        pages rendered and handed over as arrays, per second
+#   traced_peak_mb peak of Python/NumPy allocations (tracemalloc)
+#   rss_peak_mb    peak RSS growth over the run — also catches PIL's and
+#                  pdf2image's untraced buffers
+#
+# Usage (from services/paddleocr-service, poppler-utils installed):
+#   python benchmarks/bench_raster.py guide.pdf
+#   python benchmarks/bench_raster.py guide.pdf --dpi 200 --gray --window 4 --repeat 5
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pdf2image import pdfinfo_from_path  # noqa: E402
+
+from memory import PeakRssSampler  # noqa: E402
+from raster import RASTER_BACKENDS, PageRasterizer  # noqa: E402
+
+
+def run_once(args: argparse.Namespace, backend: str) -> dict:
+    rasterizer = PageRasterizer(
+        args.pdf,
+        args.pages,
+        dpi=args.dpi,
+        mode="windowed",
+        window=args.window,
+        thread_count=1,
+        grayscale=args.gray,
+        backend=backend,
+    )
+    pages = 0
+    pixel_bytes = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    with PeakRssSampler() as rss:
+        for _, _, img_array in rasterizer:
+            pages += 1
+            pixel_bytes += img_array.nbytes
+            del img_array
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "pages": pages,
+        "seconds": elapsed,
+        "pixel_bytes": pixel_bytes,
+        "traced_peak": traced_peak,
+        "rss_peak": rss.peak_bytes - rss.start_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare raster backends")
+    parser.add_argument("pdf")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--pages", type=int, default=0, help="first N pages (default: all)")
+    parser.add_argument("--window", type=int, default=8)
+    parser.add_argument("--gray", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", choices=RASTER_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not args.pages:
+        args.pages = pdfinfo_from_path(args.pdf)["Pages"]
+
+    if args.only:
+        print(json.dumps(run_once(args, args.only)))
+        return
+
+    print(
+        f"{args.pdf}: {args.pages} pages at {args.dpi} DPI, "
+        f"{'gray' if args.gray else 'rgb'}, window={args.window}, best of {args.repeat}"
+    )
+    print(f"{'backend':<10} {'pages/s':>8} {'traced_peak_mb':>15} {'rss_peak_mb':>12}")
+    for backend in RASTER_BACKENDS:
+        runs = []
+        for _ in range(args.repeat):
+            cmd = [sys.executable, __file__, args.pdf, "--only", backend]
+            cmd += ["--dpi", str(args.dpi), "--pages", str(args.pages), "--window", str(args.window)]
+            if args.gray:
+                cmd.append("--gray")
+            out = subprocess.run(cmd, capture_output=True, check=True, text=True).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        best = min(runs, key=lambda r: r["seconds"])
+        mb = 1024 * 1024
+        print(
+            f"{backend:<10} {best['pages'] / best['seconds']:>8.2f} "
+            f"{min(r['traced_peak'] for r in runs) / mb:>15.1f} "
+            f"{min(r['rss_peak'] for r in runs) / mb:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
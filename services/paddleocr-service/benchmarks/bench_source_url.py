@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/bench_source_url.py
+# Time to first page: relayed upload vs fetch-by-URL.
+#
+# A local HTTP server stands in for Supabase storage and serves the PDF,
+# optionally throttled to --rate-kbps to look like a real link. Two flows
+# are timed against a running service's /api/extract/stream, up to the
+# first "page" record:
+#   relay       the old PaddleOcrAdapter path — download the PDF from
+#               storage, then upload the same bytes as multipart
+#   source_url  send the storage URL; the service streams it to disk itself
+# The result cache would answer the second run of the same bytes, so each
+# run appends a random trailer to the PDF (after %%EOF, ignored by poppler).
+#
+# Usage (from services/paddleocr-service, service already running with
+# SOURCE_URL_ALLOWED_HOSTS=127.0.0.1:8766):
+#   python benchmarks/bench_source_url.py guide.pdf
+#   python benchmarks/bench_source_url.py guide.pdf --rate-kbps 4000 --repeat 3
+
+import argparse
+import http.server
+import os
+import statistics
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+
+class _Storage(http.server.BaseHTTPRequestHandler):
+    documents: dict[str, bytes] = {}
+    rate_bytes_per_s = 0
+
+    def do_GET(self):
+        body = self.documents.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        chunk = 64 * 1024
+        for offset in range(0, len(body), chunk):
+            self.wfile.write(body[offset : offset + chunk])
+            if self.rate_bytes_per_s:
+                time.sleep(chunk / self.rate_bytes_per_s)
+
+    def log_message(self, *args):
+        pass
+
+
+def _headers() -> dict:
+    key = os.environ.get("PADDLEOCR_API_KEY")
+    return {"x-api-key": key} if key else {}
+
+
+def _first_page_seconds(request: urllib.request.Request, start: float) -> float:
+    with urllib.request.urlopen(request, timeout=600) as resp:
+        for line in resp:
+            if b'"type":"page"' in line.replace(b" ", b""):
+                return time.perf_counter() - start
+    raise SystemExit("stream ended without a page record")
+
+
+def relay(service: str, storage_url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(storage_url) as resp:
+        content = resp.read()
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="guide.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        f"{service}/api/extract/stream",
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}", **_headers()},
+    )
+    return _first_page_seconds(request, start)
+
+
+def source_url(service: str, storage_url: str) -> float:
+    start = time.perf_counter()
+    request = urllib.request.Request(
+        f"{service}/api/extract/stream",
+        data=urllib.parse.urlencode({"source_url": storage_url}).encode(),
+        headers={"Content-Type": "application/x-www-form-urlencoded", **_headers()},
+    )
+    return _first_page_seconds(request, start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time to first page: relay vs source_url")
+    parser.add_argument("pdf")
+    parser.add_argument("--service", default="http://127.0.0.1:8000")
+    parser.add_argument("--port", type=int, default=8766, help="storage stand-in port")
+    parser.add_argument("--rate-kbps", type=int, default=0, help="throttle storage (0 = off)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        pdf = f.read()
+    _Storage.rate_bytes_per_s = args.rate_kbps * 1000 // 8
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", args.port), _Storage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results: dict[str, list[float]] = {"relay": [], "source_url": []}
+    try:
+        for _ in range(args.repeat):
+            for name, flow in (("relay", relay), ("source_url", source_url)):
+                path = f"/{uuid.uuid4().hex}.pdf"
+                _Storage.documents[path] = pdf + f"\n%{uuid.uuid4().hex}\n".encode()
+                storage_url = f"http://127.0.0.1:{args.port}{path}"
+                results[name].append(flow(args.service, storage_url))
+    finally:
+        server.shutdown()
+
+    print(f"{len(pdf) / 1e6:.1f}MB PDF, storage rate {args.rate_kbps or 'unthrottled'} kbps")
+    print(f"{'flow':<12} {'median_s':>9} {'min_s':>7} {'max_s':>7}")
+    for name, times in results.items():
+        print(f"{name:<12} {statistics.median(times):>9.2f} {min(times):>7.2f} {max(times):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
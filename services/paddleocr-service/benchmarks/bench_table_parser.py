@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/bench_table_parser.py
+# Table HTML parser benchmark: tables.parse_table_html vs the regex-split
+# parser it replaced (kept below as legacy_parse_table_html).
+#
+# Generated tables carry a merged two-row header like real rate tables, and
+# cells with inline markup so cell text arrives in several fragments. Per
+# size it reports ms per table for each parser and whether the output grid
+# is rectangular.
+#
+# Usage (from services/paddleocr-service):
+#   python benchmarks/bench_table_parser.py
+#   python benchmarks/bench_table_parser.py --sizes 40x25,200x50 --repeat 20
+
+import argparse
+import html as html_module
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tables import parse_table_html  # noqa: E402
+
+
+def legacy_parse_table_html(table_html: str) -> list[list[str]]:
+    """The pre-grid parser (logic unchanged): no rowspan/colspan handling."""
+    if not table_html:
+        return []
+
+    rows: list[list[str]] = []
+    current_row: list[str] = []
+    in_cell = False
+    cell_text = ""
+
+    parts = re.split(r"(<[^>]+>)", table_html)
+
+    for part in parts:
+        if not part:
+            continue
+
+        lower = part.lower().strip()
+
+        if lower.startswith("<tr"):
+            current_row = []
+        elif lower == "</tr>":
+            if current_row:
+                rows.append(current_row)
+        elif lower.startswith("<td") or lower.startswith("<th"):
+            in_cell = True
+            cell_text = ""
+        elif lower in ("</td>", "</th>"):
+            in_cell = False
+            current_row.append(html_module.unescape(cell_text).strip())
+        elif in_cell and not lower.startswith("<"):
+            cell_text += part
+
+    return rows
+
+
+def make_table(rows: int, cols: int) -> str:
+    """rows×cols body under a header whose first column spans two rows and
+    whose remaining columns are grouped in merged pairs."""
+    out = ["<html><body><table><thead><tr>", '<td rowspan="2">Product</td>']
+    for group in range((cols - 1) // 2):
+        out.append(f'<td colspan="2">Band {group}</td>')
+    if (cols - 1) % 2:
+        out.append('<td rowspan="2">Notes</td>')
+    out.append("</tr><tr>")
+    for group in range((cols - 1) // 2):
+        out.append("<td>Year 1</td><td>Renewal</td>")
+    out.append("</tr></thead><tbody>")
+    for r in range(rows):
+        out.append("<tr>")
+        out.append(f"<td>Plan <b>{r}</b> &amp; rider</td>")
+        for c in range(1, cols):
+            out.append(f"<td>{(r * c) % 97}.{c % 10}<sup>%</sup></td>")
+        out.append("</tr>")
+    out.append("</tbody></table></body></html>")
+    return "".join(out)
+
+
+def rectangular(grid: list[list[str]]) -> bool:
+    return len({len(row) for row in grid}) <= 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare table HTML parsers")
+    parser.add_argument("--sizes", default="40x25,100x40,400x50", help="ROWSxCOLS,...")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'table':<10} {'cells':>7} {'html_kb':>8} {'legacy_ms':>10} {'grid_ms':>8}  rectangular")
+    for size in args.sizes.split(","):
+        rows, cols = (int(v) for v in size.lower().split("x"))
+        table_html = make_table(rows, cols)
+        results = {}
+        for name, fn in (("legacy", legacy_parse_table_html), ("grid", parse_table_html)):
+            best = min(timeit.repeat(lambda: fn(table_html), number=1, repeat=args.repeat))
+            results[name] = (best * 1000, rectangular(fn(table_html)))
+        print(
+            f"{size:<10} {(rows + 2) * cols:>7} {len(table_html) / 1024:>8.1f} "
+            f"{results['legacy'][0]:>10.2f} {results['grid'][0]:>8.2f}  "
+            f"legacy={results['legacy'][1]} grid={results['grid'][1]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/measure_rss.py
+# Per-process memory of the service with spawned vs forked OCR workers.
+#
+# For each OCR_POOL_START_METHOD it starts `uvicorn app:app` with
+# OCR_WORKERS workers, waits for /ready, optionally extracts one PDF (so
+# inference has touched whatever it touches), then reads every process's
+# /proc/<pid>/smaps_rollup. Reported per process:
+#   rss_mb   resident pages, shared ones counted in full by every process
+#   pss_mb   shared pages split evenly between the processes mapping them
+#   uss_mb   pages only this process maps (private clean + dirty)
+# RSS overstates forked workers — the weights they share with the server
+# process show up in each worker's RSS. Sum PSS for what the container
+# actually uses.
+#
+# Usage (from services/paddleocr-service, on Linux):
+#   python benchmarks/measure_rss.py
+#   python benchmarks/measure_rss.py --workers 3 --pdf guide.pdf
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def smaps_rollup(pid: int) -> dict[str, int]:
+    """Memory counters for one process, in bytes."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def children(pid: int) -> list[int]:
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    return sorted(pids)
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"server exited with {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as resp:
+                if resp.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(1)
+    raise SystemExit(f"not ready after {timeout}s")
+
+
+def extract(base_url: str, pdf: str) -> None:
+    boundary = uuid.uuid4().hex
+    with open(pdf, "rb") as f:
+        content = f.read()
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{os.path.basename(pdf)}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        f"{base_url}/api/extract",
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    if os.environ.get("PADDLEOCR_API_KEY"):
+        request.add_header("x-api-key", os.environ["PADDLEOCR_API_KEY"])
+    with urllib.request.urlopen(request, timeout=600) as resp:
+        resp.read()
+
+
+def measure(start_method: str, args: argparse.Namespace) -> list[tuple[str, dict]]:
+    env = dict(
+        os.environ,
+        OCR_WORKERS=str(args.workers),
+        OCR_POOL_START_METHOD=start_method,
+        WARMUP_ENABLED="1",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port)],
+        cwd=SERVICE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base_url, server, args.timeout)
+        if args.pdf:
+            extract(base_url, args.pdf)
+        rows = [("server", smaps_rollup(server.pid))]
+        # The executor's resource tracker (spawn only) is tiny but counted
+        rows += [(f"worker {pid}", smaps_rollup(pid)) for pid in children(server.pid)]
+        return rows
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-process RSS/PSS, spawn vs fork")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--pdf", help="extract this PDF before measuring")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for /ready")
+    parser.add_argument("--methods", default="spawn,fork")
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    for start_method in args.methods.split(","):
+        rows = measure(start_method, args)
+        print(f"\nOCR_POOL_START_METHOD={start_method}, OCR_WORKERS={args.workers}")
+        print(f"{'process':<14} {'rss_mb':>8} {'pss_mb':>8} {'uss_mb':>8}")
+        for name, mem in rows:
+            print(
+                f"{name:<14} {mem['rss'] / mb:>8.0f} {mem['pss'] / mb:>8.0f} "
+                f"{mem['uss'] / mb:>8.0f}"
+            )
+        total = {key: sum(mem[key] for _, mem in rows) for key in ("rss", "pss", "uss")}
+        print(
+            f"{'total':<14} {total['rss'] / mb:>8.0f} {total['pss'] / mb:>8.0f} "
+            f"{total['uss'] / mb:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# services/paddleocr-service/benchmarks/soak_memory.py
+# Steady-state RSS and GC time over a long run of extractions.
+#
+# For each PAGE_BUFFER_POOL_BYTES setting it starts `uvicorn app:app` with
+# the in-process engine (OCR_WORKERS=1, so the server's own /metrics cover
+# all rasterize/OCR work) and both caches off (so every request does the
+# full work), then extracts the same PDF --requests times. Every
+# --sample-every requests it scrapes /metrics for:
+#   rss_mb     process_resident_memory_bytes
+#   gc_ms      paddleocr_gc_seconds_total, all generations
+#   gc_full    python_gc_collections_total{generation="2"}
+# and finally prints the trajectory plus steady-state RSS (median over the
+# last third of samples) and GC time per request.
+#
+# Usage (from services/paddleocr-service):
+#   python benchmarks/soak_memory.py guide.pdf
+#   python benchmarks/soak_memory.py guide.pdf --requests 200 --pools 0,134217728
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from measure_rss import SERVICE_DIR, extract, wait_ready  # noqa: E402
+
+_SAMPLE_RE = re.compile(r'^(\w+)(?:\{([^}]*)\})? ([0-9.e+-]+)$', re.MULTILINE)
+
+
+def scrape(base_url: str) -> dict[str, float]:
+    with urllib.request.urlopen(f"{base_url}/metrics", timeout=10) as resp:
+        text = resp.read().decode()
+    values = {"rss": 0.0, "gc_seconds": 0.0, "gc_full": 0.0}
+    for name, labels, value in _SAMPLE_RE.findall(text):
+        if name == "process_resident_memory_bytes":
+            values["rss"] = float(value)
+        elif name == "paddleocr_gc_seconds_total":
+            values["gc_seconds"] += float(value)
+        elif name == "python_gc_collections_total" and 'generation="2"' in labels:
+            values["gc_full"] = float(value)
+    return values
+
+
+def soak(pool_bytes: int, args: argparse.Namespace) -> list[tuple[int, dict]]:
+    env = dict(
+        os.environ,
+        OCR_WORKERS="1",
+        PAGE_BUFFER_POOL_BYTES=str(pool_bytes),
+        PAGE_CACHE_MAX_BYTES="0",
+        RESULT_CACHE_MAX_BYTES="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port)],
+        cwd=SERVICE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base_url, server, args.timeout)
+        samples = [(0, scrape(base_url))]
+        for n in range(1, args.requests + 1):
+            extract(base_url, args.pdf)
+            if n % args.sample_every == 0 or n == args.requests:
+                samples.append((n, scrape(base_url)))
+        return samples
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RSS and GC time across many extractions")
+    parser.add_argument("pdf")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--sample-every", type=int, default=10)
+    parser.add_argument(
+        "--pools", default=f"0,{128 * 1024 * 1024}", help="PAGE_BUFFER_POOL_BYTES values"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for /ready")
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    for pool_bytes in (int(value) for value in args.pools.split(",")):
+        start = time.perf_counter()
+        samples = soak(pool_bytes, args)
+        elapsed = time.perf_counter() - start
+        print(f"\nPAGE_BUFFER_POOL_BYTES={pool_bytes} ({args.requests} requests, {elapsed:.0f}s)")
+        print(f"{'requests':>8} {'rss_mb':>8} {'gc_ms':>8} {'gc_full':>8}")
+        for n, values in samples:
+            print(
+                f"{n:>8} {values['rss'] / mb:>8.0f} {values['gc_seconds'] * 1000:>8.0f} "
+                f"{values['gc_full']:>8.0f}"
+            )
+        tail = samples[len(samples) * 2 // 3 :]
+        steady_rss = statistics.median(values["rss"] for _, values in tail)
+        first, last = samples[0][1], samples[-1][1]
+        gc_per_request = (last["gc_seconds"] - first["gc_seconds"]) / args.requests
+        print(
+            f"steady-state rss {steady_rss / mb:.0f}MB, "
+            f"gc {gc_per_request * 1000:.1f}ms/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
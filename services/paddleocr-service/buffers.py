@@ -0,0 +1,82 @@
+# services/paddleocr-service/buffers.py
+# Reusable page bitmaps.
+#
+# Each rasterized page used to be a fresh multi-megabyte array, dropped a
+# page later, with forced gc.collect() calls sprinkled around to keep RSS
+# down. Pages of a document mostly share one shape (same paper size and
+# DPI), so once a page has been OCR'd its array is released back here and
+# the next page of that shape is rendered straight into it. The allocator
+# sees a handful of long-lived blocks instead of one large alloc/free per
+# page, and nothing needs a full collection to be reclaimed.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PageBufferPool:
+    """Free lists of uint8 page arrays, keyed by shape.
+
+    acquire() hands out a free array of the requested shape, or a new one
+    when none is free; its contents are undefined. release() takes an array
+    back once the caller holds no other reference to it (views included).
+    Free arrays are capped at max_bytes in total, dropping the shape that
+    was released least recently first; max_bytes=0 disables pooling.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._free: OrderedDict[tuple, list[np.ndarray]] = OrderedDict()
+        self._free_bytes = 0
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.allocated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def acquire(self, shape: tuple) -> np.ndarray:
+        shape = tuple(shape)
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                array = free.pop()
+                if not free:
+                    del self._free[shape]
+                self._free_bytes -= array.nbytes
+                self.reused += 1
+                return array
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, array: np.ndarray) -> None:
+        # Only whole arrays that own their memory; a view would pin (and let
+        # the next page overwrite) someone else's buffer
+        if (
+            not self.enabled
+            or array.base is not None
+            or array.dtype != np.uint8
+            or not array.flags.c_contiguous
+            or array.nbytes > self.max_bytes
+        ):
+            return
+        with self._lock:
+            self._free.setdefault(array.shape, []).append(array)
+            self._free.move_to_end(array.shape)
+            self._free_bytes += array.nbytes
+            while self._free_bytes > self.max_bytes:
+                shape, free = next(iter(self._free.items()))
+                self._free_bytes -= free.pop(0).nbytes
+                if not free:
+                    del self._free[shape]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "free_bytes": self._free_bytes,
+                "free_buffers": sum(len(free) for free in self._free.values()),
+                "reused": self.reused,
+                "allocated": self.allocated,
+            }
@@ -0,0 +1,59 @@
+# services/paddleocr-service/cancellation.py
+# Cooperative cancellation for in-flight extractions.
+#
+# OCR runs in executor threads (and pool processes) that can't be
+# interrupted mid-page, so the request side flips a token and the
+# extraction checks it between pages. A cancelled document stops at the
+# next page boundary, releasing its executor slot, page bitmaps and temp
+# file instead of OCRing pages nobody will read.
+
+import threading
+import time
+
+CLIENT_DISCONNECT = "client_disconnect"
+DEADLINE = "deadline"
+
+CANCEL_REASONS = (CLIENT_DISCONNECT, DEADLINE)
+
+
+class Cancelled(Exception):
+    """Raised at a page boundary once the extraction's token is cancelled."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Extraction cancelled ({reason})")
+        self.reason = reason
+
+
+class CancelToken:
+    """Set from the event loop, checked from worker threads.
+
+    deadline is a time.monotonic() value; past it the token reads as
+    cancelled with reason "deadline" without anyone calling cancel().
+    """
+
+    def __init__(self, deadline: float | None = None):
+        self.deadline = deadline
+        self._reason: str | None = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str) -> None:
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def reason(self) -> str | None:
+        if self._event.is_set():
+            return self._reason
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return DEADLINE
+        return None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def check(self) -> None:
+        reason = self.reason
+        if reason is not None:
+            raise Cancelled(reason)
@@ -0,0 +1,275 @@
+# services/paddleocr-service/coordinator.py
+# Fan one large PDF out across peer replicas.
+#
+# A replica works through a document's pages one after another, so adding
+# replicas raises how many guides we can take at once but does nothing for
+# the latency of one 100-page guide. In coordinator mode (COORDINATOR_PEERS
+# set) the replica that receives a large document cuts it into page ranges,
+# writes each range out as its own small PDF and posts the shards to its
+# peers' ordinary /api/extract, one shard per peer at a time. The shard
+# results are stitched back into one document: page numbers shifted back to
+# the original pages, table_index counted document-wide again, table and
+# block ids rebuilt to match.
+#
+# Peers need no special mode — a shard is just a short PDF to them, with
+# their result and page caches keyed on its bytes. A shard is never larger
+# than the fan-out threshold, so a peer that is itself a coordinator (or the
+# coordinator listed as its own peer) extracts it locally.
+#
+# A shard that fails — connection error, timeout, non-200 — goes back in the
+# queue for another peer, and the peer that failed it gets no more shards of
+# that document.
+
+import asyncio
+import json
+import logging
+import math
+import os
+import subprocess
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+from cancellation import CancelToken
+from telemetry import SHARD_REQUESTS
+
+logger = logging.getLogger("paddleocr-service.coordinator")
+
+# pdfseparate/pdfunite on a document that pdfinfo has already accepted
+SPLIT_TIMEOUT_S = 60
+
+
+class ShardError(Exception):
+    """One attempt at a shard failed on one peer; another peer may succeed."""
+
+
+class ShardFailed(Exception):
+    """A shard could not be extracted by any peer, failing the document."""
+
+
+@dataclass
+class Shard:
+    """Pages first_page..last_page of the original document (1-based, inclusive)."""
+
+    first_page: int
+    last_page: int
+    path: str | None = None
+    peers: list[str] = field(default_factory=list)  # peers tried, in order
+    result: dict | None = None
+
+    @property
+    def page_count(self) -> int:
+        return self.last_page - self.first_page + 1
+
+
+def parse_peers(value: str) -> tuple[str, ...]:
+    """COORDINATOR_PEERS: comma-separated base URLs (http://host:port)."""
+    return tuple(peer.strip().rstrip("/") for peer in value.split(",") if peer.strip())
+
+
+def split_ranges(total_pages: int, max_shard_pages: int, min_shards: int = 1) -> list[Shard]:
+    """Consecutive, evenly sized page ranges covering the document.
+
+    At most max_shard_pages pages each, and at least min_shards of them
+    (one per peer) when there are enough pages, so no peer sits idle while
+    another works through two shards.
+    """
+    count = max(math.ceil(total_pages / max_shard_pages), min(min_shards, total_pages))
+    size, extra = divmod(total_pages, count)
+    shards = []
+    first = 1
+    for n in range(count):
+        last = first + size + (1 if n < extra else 0) - 1
+        shards.append(Shard(first, last))
+        first = last + 1
+    return shards
+
+
+def split_pdf(pdf_path: str, shards: list[Shard], workdir: str) -> None:
+    """Write each shard's pages to its own PDF in workdir, setting shard.path."""
+    last_page = shards[-1].last_page
+    subprocess.run(
+        [
+            "pdfseparate",
+            "-f",
+            "1",
+            "-l",
+            str(last_page),
+            pdf_path,
+            os.path.join(workdir, "page-%d.pdf"),
+        ],
+        capture_output=True,
+        check=True,
+        timeout=SPLIT_TIMEOUT_S,
+    )
+    for shard in shards:
+        parts = [
+            os.path.join(workdir, f"page-{page}.pdf")
+            for page in range(shard.first_page, shard.last_page + 1)
+        ]
+        shard.path = os.path.join(workdir, f"pages-{shard.first_page}-{shard.last_page}.pdf")
+        if len(parts) == 1:
+            os.replace(parts[0], shard.path)
+            continue
+        subprocess.run(
+            ["pdfunite", *parts, shard.path],
+            capture_output=True,
+            check=True,
+            timeout=SPLIT_TIMEOUT_S,
+        )
+        for part in parts:
+            os.unlink(part)
+
+
+async def send_shard(
+    client: httpx.AsyncClient,
+    peer: str,
+    shard: Shard,
+    params: dict,
+    headers: dict,
+    timeout_s: float,
+) -> dict:
+    """POST one shard to a peer's /api/extract; its full result payload.
+
+    Raises ShardError for anything short of a complete result.
+    """
+    try:
+        with open(shard.path, "rb") as f:
+            response = await client.post(
+                f"{peer}/api/extract",
+                params=params,
+                headers=headers,
+                files={"file": (os.path.basename(shard.path), f, "application/pdf")},
+                timeout=httpx.Timeout(timeout_s, connect=10),
+            )
+    except httpx.HTTPError as err:
+        raise ShardError(f"{type(err).__name__}: {err}") from None
+    if response.status_code != 200:
+        raise ShardError(f"HTTP {response.status_code}: {response.text[:200]}")
+    try:
+        payload = await asyncio.to_thread(json.loads, response.content)
+    except ValueError as err:
+        raise ShardError(f"Unreadable response: {err}") from None
+    if len(payload.get("pages", ())) != shard.page_count:
+        raise ShardError(
+            f"Expected {shard.page_count} pages, got {len(payload.get('pages', ()))}"
+        )
+    return payload
+
+
+async def run_shards(
+    shards: list[Shard],
+    peers: tuple[str, ...],
+    send: Callable[[str, Shard], Awaitable[dict]],
+    max_attempts: int,
+    cancel: CancelToken,
+    poll_interval_s: float = 0.5,
+) -> None:
+    """Extract every shard on some peer, filling in shard.result.
+
+    Each peer takes one shard at a time from a shared queue, so a faster
+    peer simply takes more of them. A peer that fails a shard is dropped
+    for the rest of the document and the shard is queued again; ShardFailed
+    once a shard has been tried max_attempts times or every peer has been
+    dropped. Stops at the next poll, abandoning shard requests in flight,
+    once `cancel` is cancelled.
+    """
+    pending = deque(shards)
+    remaining = len(shards)
+    live = len(peers)
+    error: ShardFailed | None = None
+    changed = asyncio.Event()
+
+    async def work(peer: str) -> None:
+        nonlocal remaining, live, error
+        while remaining and error is None:
+            if not pending:
+                # Everything left is in flight elsewhere; one may come back
+                changed.clear()
+                await changed.wait()
+                continue
+            shard = pending.popleft()
+            shard.peers.append(peer)
+            try:
+                shard.result = await send(peer, shard)
+            except ShardError as err:
+                SHARD_REQUESTS.labels("error").inc()
+                logger.warning(
+                    f"Pages {shard.first_page}-{shard.last_page} failed on {peer} "
+                    f"(attempt {len(shard.peers)}): {err}"
+                )
+                live -= 1
+                if len(shard.peers) >= max_attempts:
+                    error = ShardFailed(
+                        f"Pages {shard.first_page}-{shard.last_page} failed on "
+                        f"{len(shard.peers)} peers; last error: {err}"
+                    )
+                elif live == 0:
+                    error = ShardFailed(
+                        f"No peers left for pages {shard.first_page}-{shard.last_page}; "
+                        f"last error: {err}"
+                    )
+                else:
+                    pending.appendleft(shard)
+                changed.set()
+                return
+            SHARD_REQUESTS.labels("ok").inc()
+            remaining -= 1
+            changed.set()
+
+    workers = [asyncio.create_task(work(peer), name=f"shards-{peer}") for peer in peers]
+    try:
+        while True:
+            done, _ = await asyncio.wait(workers, timeout=poll_interval_s)
+            if error is not None:
+                raise error
+            if len(done) == len(workers):
+                for task in done:
+                    task.result()
+                return
+            cancel.check()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def merge_shards(shards: list[Shard]) -> dict:
+    """One document's {"pages", "tables"} from its shards' results, in page order.
+
+    Page numbers are shifted back to the original document, table_index
+    counts across all shards, and table_id/block_id (same formats as the
+    single-replica path) are rebuilt from them, blocks' table_id included.
+    """
+    pages: list[dict] = []
+    tables: list[dict] = []
+    for shard in shards:
+        offset = shard.first_page - 1
+        for page in shard.result["pages"]:
+            page_num = page["page_number"] + offset
+            table_ids = {}
+            page_tables = []
+            for table in page["tables"]:
+                table_index = len(tables) + len(page_tables)
+                table_id = f"t-p{page_num}-{table_index}"
+                table_ids[table["table_id"]] = table_id
+                page_tables.append(
+                    {
+                        **table,
+                        "table_id": table_id,
+                        "page_number": page_num,
+                        "table_index": table_index,
+                    }
+                )
+            blocks = []
+            for block in page["blocks"]:
+                # p{page}-b{idx}: only the page part changes
+                _page, idx = block["block_id"].split("-", 1)
+                block = {**block, "block_id": f"p{page_num}-{idx}"}
+                if "table_id" in block:
+                    block["table_id"] = table_ids[block["table_id"]]
+                blocks.append(block)
+            pages.append({**page, "page_number": page_num, "blocks": blocks, "tables": page_tables})
+            tables.extend(page_tables)
+    return {"pages": pages, "tables": tables}
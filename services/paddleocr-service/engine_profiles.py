@@ -0,0 +1,172 @@
+# services/paddleocr-service/engine_profiles.py
+# Cheaper engine passes for requests that don't need every feature.
+#
+# A full PP-Structure pass runs layout detection, text detection and
+# recognition, and table structure recognition on every table region. The
+# `features` a caller asks for (ocr, tables, layout) pick the cheapest pass
+# that still covers them. Every pass runs on the models of the one loaded
+# PP-Structure engine, so no profile adds weights in memory or a load:
+#   full         layout + OCR + table recognition — tables requested, or
+#                no features given
+#   layout_text  layout + OCR; table regions are read as plain text
+#   text         OCR only, no layout model; lines grouped into paragraphs
+#   layout       layout model only — region types and boxes, no text
+#   auto         per-page routing (ENGINE_ROUTING=auto, in place of full):
+#                the layout model runs first, once; only pages where it
+#                finds a table run the table structure model on those
+#                regions ("structure" route), every other page just gets
+#                OCR text placed into its layout regions ("text" route)
+#
+# Every pass returns PP-Structure-shaped regions ({type, bbox, res}), so
+# compaction, the page cache and page assembly don't care which ran.
+
+FEATURES = ("ocr", "tables", "layout")
+PROFILES = ("full", "layout_text", "text", "layout", "auto")
+DEFAULT_PROFILE = "full"
+ROUTINGS = ("full", "auto")
+ROUTES = ("structure", "text")
+
+# A text line starts a new paragraph when the gap above it is more than this
+# many times the previous line's height
+PARAGRAPH_GAP_LINES = 0.8
+
+# Markup the recognizer can emit; PP-Structure's own text pass removes it,
+# so the cheaper passes do too and their text matches `full`
+STYLE_TOKENS = (
+    "<strike>", "<sup>", "</sup>", "<sub>", "</sub>", "<b>", "</b>",
+    "<overline>", "</overline>", "<underline>", "</underline>", "<i>", "</i>",
+)
+
+_PROFILE_FEATURES = {
+    "layout_text": frozenset({"ocr", "layout"}),
+    "text": frozenset({"ocr"}),
+    "layout": frozenset({"layout"}),
+}
+
+
+def profile_for(features: frozenset[str] | None, routing: str = "full") -> str:
+    """The cheapest profile covering `features`; None or empty means all of them.
+
+    routing="auto" routes tables-capable requests per page instead of full.
+    """
+    if not features or "tables" in features:
+        return "auto" if routing == "auto" else "full"
+    if "layout" in features:
+        return "layout_text" if "ocr" in features else "layout"
+    return "text"
+
+
+def features_for(profile: str) -> frozenset[str]:
+    """Features that select `profile` again on another replica (profile_for's
+    inverse); full and auto both come from asking for everything."""
+    return _PROFILE_FEATURES.get(profile, frozenset())
+
+
+def page_fingerprint(fingerprint: str, profile: str) -> str:
+    """Page cache fingerprint for pages OCR'd with `profile`."""
+    return fingerprint if profile == DEFAULT_PROFILE else f"{fingerprint}-{profile}"
+
+
+def run_profile(engine, img_array, profile: str) -> list[dict]:
+    """Raw regions for one RGB page from the passes `profile` needs."""
+    if profile == "full":
+        return engine(img_array)
+    if profile == "text":
+        return _paragraphs(_text_lines(engine, img_array))
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown engine profile {profile!r} (expected one of {PROFILES})")
+
+    layout_res, _elapse = engine.layout_predictor(img_array)
+    regions = [
+        {"type": region["label"].lower(), "bbox": [int(v) for v in region["bbox"]], "res": []}
+        for region in layout_res
+    ]
+    if profile == "layout":
+        for region in regions:
+            if region["type"] == "table":
+                region["res"] = {}
+        return regions
+
+    # auto, structure route: table structure (with its own OCR of the cell
+    # text) on each table region, like the full pass
+    structure = profile == "auto" and page_route(regions) == "structure"
+    if structure:
+        for region in regions:
+            if region["type"] == "table":
+                x1, y1, x2, y2 = (max(0, v) for v in region["bbox"])
+                crop = img_array[y1:y2, x1:x2]
+                region["res"] = engine.table_system(crop)[0] if crop.size else {}
+
+    # Each line goes to the region containing its centre; lines outside
+    # every region become paragraphs. Table regions that went through the
+    # structure model already have their text.
+    unplaced = []
+    for line in _text_lines(engine, img_array):
+        region = _containing(regions, line["text_region"])
+        if region is None:
+            unplaced.append(line)
+        elif isinstance(region["res"], list):
+            region["res"].append(line)
+    if not structure:
+        # layout_text: table regions are read as plain text
+        for region in regions:
+            if region["type"] == "table":
+                region["type"] = "text"
+    return regions + _paragraphs(unplaced)
+
+
+def page_route(regions: list[dict]) -> str:
+    """The auto route a page's regions took (or, given its layout, will take)."""
+    return "structure" if any(region["type"] == "table" for region in regions) else "text"
+
+
+def _text_lines(engine, img_array) -> list[dict]:
+    """Detected and recognized lines, top to bottom, as PP-Structure line dicts
+    (style tokens stripped, as PP-Structure does)."""
+    boxes, rec_res, _time = engine.text_system(img_array)
+    if boxes is None:
+        return []
+    lines = []
+    for box, (text, confidence) in zip(boxes, rec_res):
+        for token in STYLE_TOKENS:
+            text = text.replace(token, "")
+        xs = [float(point[0]) for point in box]
+        ys = [float(point[1]) for point in box]
+        lines.append(
+            {
+                "text": text,
+                "confidence": float(confidence),
+                "text_region": [min(xs), min(ys), max(xs), max(ys)],
+            }
+        )
+    return lines
+
+
+def _containing(regions: list[dict], box: list[float]) -> dict | None:
+    cx = (box[0] + box[2]) / 2
+    cy = (box[1] + box[3]) / 2
+    for region in regions:
+        x1, y1, x2, y2 = region["bbox"]
+        if x1 <= cx <= x2 and y1 <= cy <= y2:
+            return region
+    return None
+
+
+def _paragraphs(lines: list[dict]) -> list[dict]:
+    """Group top-to-bottom lines into "text" regions at vertical gaps."""
+    regions: list[dict] = []
+    previous = None
+    for line in lines:
+        x1, y1, x2, y2 = line["text_region"]
+        if previous is not None:
+            gap = y1 - previous[3]
+            if gap <= PARAGRAPH_GAP_LINES * (previous[3] - previous[1]):
+                region = regions[-1]
+                bbox = region["bbox"]
+                region["bbox"] = [min(bbox[0], x1), bbox[1], max(bbox[2], x2), max(bbox[3], y2)]
+                region["res"].append(line)
+                previous = line["text_region"]
+                continue
+        regions.append({"type": "text", "bbox": [x1, y1, x2, y2], "res": [line]})
+        previous = line["text_region"]
+    return regions
@@ -0,0 +1,222 @@
+# services/paddleocr-service/jobs.py
+# Asynchronous extraction jobs: bounded queue, progress, timed eviction.
+#
+# Jobs are in-process only — they do not survive a restart, and each
+# replica has its own queue. Callers poll GET /api/jobs/{id} instead of
+# holding an HTTP request open for the whole OCR run.
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+logger = logging.getLogger("paddleocr-service.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity."""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"Job queue full, retry after {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class Job:
+    def __init__(
+        self,
+        filename: str,
+        tmp_path: str | None,
+        content_sha256: str,
+        total_pages: int,
+        options: object = None,
+        tenant: str = "default",
+    ):
+        self.id = str(uuid.uuid4())
+        self.filename = filename
+        self.tmp_path = tmp_path
+        self.content_sha256 = content_sha256
+        self.total_pages = total_pages
+        # Extraction settings, opaque to the manager — handed to the runner
+        self.options = options
+        self.tenant = tenant
+        self.status = QUEUED
+        self.pages_done = 0
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result: dict | None = None
+        self.error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def eta_seconds(self) -> float | None:
+        """Remaining time extrapolated from this job's own per-page rate."""
+        if self.status != RUNNING or not self.pages_done or self.started_at is None:
+            return None
+        per_page = (time.time() - self.started_at) / self.pages_done
+        return round(per_page * (self.total_pages - self.pages_done), 1)
+
+    def release_file(self) -> None:
+        if self.tmp_path:
+            Path(self.tmp_path).unlink(missing_ok=True)
+            self.tmp_path = None
+
+    def status_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "tenant": self.tenant,
+            "content_sha256": self.content_sha256,
+            "pages_done": self.pages_done,
+            "total_pages": self.total_pages,
+            "eta_seconds": self.eta_seconds(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs submitted jobs one at a time through `runner`.
+
+    At most max_queued jobs may wait; beyond that submit() raises
+    JobQueueFull with a Retry-After estimate rather than accepting work the
+    service can't get to. Finished jobs are kept for result_ttl_s seconds.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Awaitable[dict]],
+        max_queued: int,
+        result_ttl_s: int,
+    ):
+        self._runner = runner
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max(1, max_queued))
+        self._jobs: dict[str, Job] = {}
+        self.result_ttl_s = result_ttl_s
+        self._tasks: list[asyncio.Task] = []
+        # Smoothed seconds per page, for Retry-After estimates
+        self._seconds_per_page = 1.0
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._work(), name="job-worker"),
+            asyncio.create_task(self._sweep_loop(), name="job-sweeper"),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            job.release_file()
+
+    def submit(self, job: Job) -> Job:
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(self.retry_after_s()) from None
+        self._jobs[job.id] = job
+        logger.info(f"Job {job.id} queued: {job.filename} ({job.total_pages} pages)")
+        return job
+
+    def add_finished(self, job: Job, result: dict) -> Job:
+        """Register a job that needed no work (e.g. a result cache hit)."""
+        job.status = SUCCEEDED
+        job.pages_done = job.total_pages
+        job.result = result
+        job.started_at = job.finished_at = time.time()
+        job.release_file()
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def queue_position(self, job: Job) -> int | None:
+        if job.status != QUEUED:
+            return None
+        waiting = [j for j in self._jobs.values() if j.status == QUEUED]
+        waiting.sort(key=lambda j: j.created_at)
+        return waiting.index(job) + 1
+
+    def retry_after_s(self) -> int:
+        """Rough time until a queue slot frees, i.e. until the running job
+        finishes and the head of the queue starts."""
+        remaining = sum(
+            j.total_pages - j.pages_done for j in self._jobs.values() if j.status == RUNNING
+        )
+        return max(1, math.ceil(remaining * self._seconds_per_page))
+
+    def stats(self) -> dict:
+        by_status: dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "queued": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "jobs": by_status,
+            "seconds_per_page": round(self._seconds_per_page, 2),
+        }
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                job.result = await self._runner(job)
+                job.status = SUCCEEDED
+            except asyncio.CancelledError:
+                job.status = FAILED
+                job.error = "Service shutting down"
+                raise
+            except Exception as err:
+                logger.exception(f"Job {job.id} failed")
+                job.status = FAILED
+                job.error = getattr(err, "detail", None) or str(err)
+            finally:
+                job.finished_at = time.time()
+                job.release_file()
+                self._queue.task_done()
+
+            if job.status == SUCCEEDED and job.total_pages:
+                elapsed = job.finished_at - job.started_at
+                self._seconds_per_page = 0.8 * self._seconds_per_page + 0.2 * (
+                    elapsed / job.total_pages
+                )
+            logger.info(
+                f"Job {job.id} {job.status} in {int((job.finished_at - job.started_at) * 1000)}ms"
+            )
+
+    def sweep(self) -> int:
+        """Evict finished jobs older than the TTL; returns how many were dropped."""
+        cutoff = time.time() - self.result_ttl_s
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+    async def _sweep_loop(self) -> None:
+        interval = max(1, min(60, self.result_ttl_s // 4))
+        while True:
+            await asyncio.sleep(interval)
+            evicted = self.sweep()
+            if evicted:
+                logger.info(f"Evicted {evicted} finished job(s)")
@@ -0,0 +1,60 @@
+# services/paddleocr-service/memory.py
+# Process memory introspection for per-request reporting.
+
+import os
+import resource
+import threading
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now.
+
+    Reads /proc/self/statm on Linux; elsewhere falls back to the lifetime
+    peak from getrusage, which is the closest portable approximation.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is KB on Linux (bytes on macOS, but we only deploy Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRssSampler:
+    """Track the highest process RSS seen while the context is active.
+
+    Samples from a daemon thread so peaks inside long native calls (pdftoppm
+    decode, PP-Structure inference) are caught, not just page boundaries.
+    RSS is process-wide, so concurrent work in other threads is included.
+    """
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss > self.peak_bytes:
+            self.peak_bytes = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.start_bytes = current_rss_bytes()
+        self.peak_bytes = self.start_bytes
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
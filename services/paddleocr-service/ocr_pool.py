@@ -0,0 +1,342 @@
+# services/paddleocr-service/ocr_pool.py
+# Multi-process OCR: each worker process owns one PP-Structure engine.
+#
+# PP-Structure is not thread-safe, but separate processes each with their
+# own engine are fine. Workers rasterize their own page range (so page
+# bitmaps never cross the process boundary) and send back plain region
+# dicts, which the parent assembles in page order.
+#
+# Workers start one of two ways:
+#   spawn  each worker imports Paddle and loads its own copy of the weights.
+#   fork   the parent loads the engine once, then forks every worker from
+#          it before any other thread exists. Workers inherit the engine and
+#          share its weight pages copy-on-write instead of each holding ~1GB.
+
+import gc
+import logging
+import multiprocessing
+import signal
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from buffers import PageBufferPool
+from engine_profiles import DEFAULT_PROFILE, page_fingerprint, run_profile
+from raster import page_windows, render_pages
+from result_cache import DiskCache, pixel_key
+from scheduler import FairScheduler, Ticket
+from warmup import synthetic_page
+
+logger = logging.getLogger("paddleocr-service.pool")
+
+# Per-process engine and page-cache handle, built once by the pool initializer.
+# With fork the engine is already set here, inherited from the parent.
+_worker_engine = None
+_worker_page_cache: DiskCache | None = None
+_worker_fingerprint = ""
+_worker_raster_backend = "pdf2image"
+_worker_buffers = PageBufferPool(0)
+
+POOL_START_METHODS = ("spawn", "fork")
+
+
+def _plain(value):
+    """Recursively convert NumPy containers/scalars to JSON-safe Python values."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def _compact_region(region: dict) -> dict:
+    """Keep only what page assembly reads: type, bbox, and text/html results.
+
+    Drops the "img" crop (a view into the page bitmap that would pin it) and
+    per-line polygons / table cell boxes, which we never return.
+    """
+    res = region.get("res", [])
+    if isinstance(res, dict):
+        res = {k: res[k] for k in ("html", "text") if k in res}
+    elif isinstance(res, list):
+        res = [
+            {k: v for k, v in line.items() if k != "text_region"} if isinstance(line, dict) else line
+            for line in res
+        ]
+    return {
+        "type": region.get("type", "text"),
+        "bbox": _plain(region.get("bbox", [0, 0, 0, 0])),
+        "res": _plain(res),
+    }
+
+
+def run_engine(
+    engine,
+    img_array: np.ndarray,
+    buffers: PageBufferPool | None = None,
+    profile: str = DEFAULT_PROFILE,
+) -> list[dict]:
+    """Run the `profile` pass of PP-Structure on one page and return compact,
+    JSON-safe region dicts (picklable for the pool, storable in the page cache).
+
+    Grayscale pages are widened to the three channels the models expect only
+    here, so a single page pays the 3x cost for the duration of its OCR
+    rather than every buffered page holding it. The widened copy comes from
+    `buffers` when given. Regions never reference img_array, so the caller
+    may release it as soon as this returns.
+    """
+    if img_array.ndim != 2:
+        return [_compact_region(region) for region in run_profile(engine, img_array, profile)]
+    shape = (*img_array.shape, 3)
+    rgb = buffers.acquire(shape) if buffers is not None else np.empty(shape, dtype=np.uint8)
+    rgb[...] = img_array[:, :, np.newaxis]
+    try:
+        return [_compact_region(region) for region in run_profile(engine, rgb, profile)]
+    finally:
+        if buffers is not None:
+            buffers.release(rgb)
+
+
+def _init_worker(
+    engine_options: dict,
+    page_cache_dir: str,
+    page_cache_max_bytes: int,
+    fingerprint: str,
+    raster_backend: str,
+    page_buffer_bytes: int,
+) -> None:
+    global _worker_engine, _worker_page_cache, _worker_fingerprint, _worker_raster_backend
+    global _worker_buffers
+    logging.basicConfig(level=logging.INFO)
+    # A forked worker inherits the server's signal handlers and wakeup fd; a
+    # SIGTERM aimed at one worker must not read as shutdown in the parent.
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    # Workers only read the page cache; the parent writes misses back so
+    # size accounting and eviction stay in one process.
+    _worker_page_cache = DiskCache(page_cache_dir, page_cache_max_bytes)
+    _worker_fingerprint = fingerprint
+    _worker_raster_backend = raster_backend
+    _worker_buffers = PageBufferPool(page_buffer_bytes)
+
+    name = multiprocessing.current_process().name
+    if _worker_engine is not None:
+        logger.info(f"Worker {name}: using preloaded engine")
+        return
+
+    from paddleocr import PPStructure
+
+    start = time.time()
+    _worker_engine = PPStructure(show_log=False, **engine_options)
+    logger.info(f"Worker {name}: engine ready in {int((time.time() - start) * 1000)}ms")
+
+
+def _ocr_page_range(
+    pdf_path: str, first_page: int, last_page: int, dpi: int, grayscale: bool, profile: str
+) -> list[dict]:
+    """Worker entry point: rasterize and OCR pages first_page..last_page."""
+    fingerprint = page_fingerprint(_worker_fingerprint, profile)
+    rendered = render_pages(
+        pdf_path,
+        first_page,
+        last_page,
+        dpi,
+        grayscale=grayscale,
+        backend=_worker_raster_backend,
+        buffers=_worker_buffers,
+    )
+    records = []
+    offset = 0
+    while True:
+        raster_start = time.time()
+        img_array = next(rendered, None)
+        if img_array is None:
+            break
+        raster_ms = int((time.time() - raster_start) * 1000)
+        ocr_start = time.time()
+        height, width = img_array.shape[:2]
+
+        key = None
+        cached = None
+        if _worker_page_cache.enabled:
+            key = pixel_key(img_array, fingerprint)
+            cached = _worker_page_cache.get(key)
+        if cached is not None:
+            regions = cached["regions"]
+        else:
+            regions = run_engine(_worker_engine, img_array, _worker_buffers, profile)
+        _worker_buffers.release(img_array)
+        del img_array
+
+        records.append(
+            {
+                "page_number": first_page + offset,
+                "width": width,
+                "height": height,
+                "dpi": dpi,
+                "regions": regions,
+                "raster_ms": raster_ms,
+                "ocr_ms": int((time.time() - ocr_start) * 1000),
+                "page_cache_key": key,
+                "cache_hit": cached is not None,
+            }
+        )
+        offset += 1
+    return records
+
+
+def _warm_up_worker(dpi: int) -> None:
+    """Worker entry point: one synthetic page through this process's engine."""
+    run_engine(_worker_engine, synthetic_page(dpi))
+
+
+def _ping() -> None:
+    pass
+
+
+class OcrProcessPool:
+    """Spread one document's pages across worker processes.
+
+    Pages are submitted in chunks of chunk_pages, with at most two chunks
+    per worker in flight so a long document can't queue every page bitmap
+    at once. Records come back in page order regardless of which worker
+    finished first.
+
+    With a `scheduler`, each chunk takes one of its slots (one per worker)
+    before it is submitted and gives it back when it finishes, so
+    concurrent documents' chunks reach the workers in the scheduler's fair
+    order rather than the executor's submission order.
+
+    With start_method="fork", pass the parent's already-loaded engine as
+    preloaded_engine and call start() while the parent is still
+    single-threaded: the executor forks every worker on its first submit.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        engine_options: dict,
+        page_cache: DiskCache,
+        fingerprint: str,
+        chunk_pages: int = 2,
+        raster_backend: str = "pdf2image",
+        start_method: str = "spawn",
+        preloaded_engine=None,
+        page_buffer_bytes: int = 0,
+        scheduler: FairScheduler | None = None,
+    ):
+        global _worker_engine
+        if start_method not in POOL_START_METHODS:
+            raise ValueError(f"Unknown pool start method: {start_method}")
+        self.workers = workers
+        self.chunk_pages = max(1, chunk_pages)
+        self.start_method = start_method
+        self.scheduler = scheduler
+        if start_method == "fork":
+            # Inherited by the children. The parent itself never reads it.
+            _worker_engine = preloaded_engine
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # spawn unless the caller forks from a single-threaded parent:
+            # forking once the event loop and executor threads are running is
+            # not safe for Paddle.
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(
+                engine_options,
+                str(page_cache.directory),
+                page_cache.max_bytes,
+                fingerprint,
+                raster_backend,
+                page_buffer_bytes,
+            ),
+        )
+
+    def start(self) -> None:
+        """Start every worker now rather than on the first document.
+
+        For fork this must run before the parent starts any thread. Python
+        objects that exist at this point are frozen out of the collector
+        first, so the parent's GC passes don't write to (and un-share) the
+        pages they live on.
+        """
+        if self.start_method == "fork":
+            gc.collect()
+            gc.freeze()
+        futures = [self._executor.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def iter_pages(
+        self,
+        pdf_path: str,
+        pages: list[int],
+        page_dpi: dict[int, int],
+        grayscale: bool = False,
+        profile: str = DEFAULT_PROFILE,
+        ticket: Ticket | None = None,
+    ) -> Iterator[dict]:
+        """Yield page records in order; page_dpi gives each page's render DPI.
+
+        With a scheduler, chunks are scheduled as `ticket`'s document.
+        """
+        ranges = deque(page_windows(sorted(pages), self.chunk_pages, page_dpi.__getitem__))
+        in_flight: deque[Future] = deque()
+        max_in_flight = self.workers * 2
+        scheduler = self.scheduler if ticket is not None else None
+
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < max_in_flight:
+                    if scheduler is not None and in_flight and in_flight[0].done():
+                        # Hand over finished pages before waiting for a slot
+                        break
+                    first, last = ranges.popleft()
+                    if scheduler is not None:
+                        scheduler.acquire(ticket)
+                    try:
+                        future = self._executor.submit(
+                            _ocr_page_range,
+                            pdf_path,
+                            first,
+                            last,
+                            page_dpi[first],
+                            grayscale,
+                            profile,
+                        )
+                    except BaseException:
+                        if scheduler is not None:
+                            scheduler.release(ticket, 0)
+                        raise
+                    if scheduler is not None:
+                        # Runs on completion, failure or cancellation alike
+                        future.add_done_callback(
+                            lambda _f, pages=last - first + 1: scheduler.release(ticket, pages)
+                        )
+                    in_flight.append(future)
+                yield from in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def warm_up(self, dpi: int) -> None:
+        """Start every worker and run a synthetic page through each engine.
+
+        Submitting one task per worker at once makes the executor spawn all
+        of them rather than reusing the first to finish.
+        """
+        futures = [self._executor.submit(_warm_up_worker, dpi) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,177 @@
+# services/paddleocr-service/pipeline.py
+# Threaded stage pipeline with bounded queues between stages.
+#
+# Each stage runs in its own thread so rasterizing page N+1 (poppler, no
+# GIL), OCR on page N (Paddle, releases the GIL in native code) and block
+# assembly for page N-1 overlap. Queues are bounded, so a fast upstream
+# stage blocks instead of piling page bitmaps up in memory.
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Raised inside a stage thread when the pipeline is shutting down."""
+
+
+class StageStats:
+    """Wall-clock accounting for one stage.
+
+    busy: running the stage's own work
+    idle: waiting for input from upstream (upstream is the bottleneck)
+    blocked: waiting for space downstream (downstream is the bottleneck)
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.busy_s = 0.0
+        self.idle_s = 0.0
+        self.blocked_s = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "busy_ms": int(self.busy_s * 1000),
+            "idle_ms": int(self.idle_s * 1000),
+            "blocked_ms": int(self.blocked_s * 1000),
+        }
+
+
+class Pipeline:
+    """Run source → stage₁ → … → stageₙ concurrently, yielding final outputs in order.
+
+    Every stage is single-threaded, so item order is preserved end to end
+    and a stage function never runs concurrently with itself — which is what
+    lets a non-thread-safe engine sit in a middle stage. The first exception
+    raised by any stage stops the pipeline and is re-raised to the consumer.
+    """
+
+    def __init__(
+        self,
+        source: Iterable,
+        stages: list[tuple[str, Callable]],
+        source_name: str = "source",
+        queue_size: int = 2,
+    ):
+        self._source = source
+        self._source_name = source_name
+        self._stages = stages
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) + 1)]
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+        self.stats = {source_name: StageStats()}
+        for name, _ in stages:
+            self.stats[name] = StageStats()
+
+    def _get(self, q: queue.Queue, stats: StageStats):
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        raise _Stopped from None
+        finally:
+            stats.idle_s += time.perf_counter() - start
+
+    def _put(self, q: queue.Queue, item, stats: StageStats) -> None:
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    if self._stop.is_set():
+                        raise _Stopped from None
+        finally:
+            stats.blocked_s += time.perf_counter() - start
+
+    def _fail(self, err: BaseException) -> None:
+        if self._error is None:
+            self._error = err
+        self._stop.set()
+
+    def _run_source(self) -> None:
+        stats = self.stats[self._source_name]
+        it = iter(self._source)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy_s += time.perf_counter() - start
+                stats.items += 1
+                self._put(self._queues[0], item, stats)
+            self._put(self._queues[0], _DONE, stats)
+        except _Stopped:
+            pass
+        except BaseException as err:
+            self._fail(err)
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    def _run_stage(self, index: int) -> None:
+        name, fn = self._stages[index]
+        stats = self.stats[name]
+        q_in, q_out = self._queues[index], self._queues[index + 1]
+        try:
+            while True:
+                item = self._get(q_in, stats)
+                if item is _DONE:
+                    self._put(q_out, _DONE, stats)
+                    return
+                start = time.perf_counter()
+                try:
+                    result = fn(item)
+                finally:
+                    stats.busy_s += time.perf_counter() - start
+                del item
+                stats.items += 1
+                self._put(q_out, result, stats)
+                del result
+        except _Stopped:
+            pass
+        except BaseException as err:
+            self._fail(err)
+
+    def __iter__(self) -> Iterator:
+        threads = [threading.Thread(target=self._run_source, name=f"pipeline-{self._source_name}")]
+        for index, (name, _) in enumerate(self._stages):
+            threads.append(
+                threading.Thread(target=self._run_stage, args=(index,), name=f"pipeline-{name}")
+            )
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        consumer = StageStats()
+        try:
+            while True:
+                try:
+                    item = self._get(self._queues[-1], consumer)
+                except _Stopped:
+                    break
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def stats_dict(self) -> dict:
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
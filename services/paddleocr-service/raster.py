@@ -0,0 +1,365 @@
+# services/paddleocr-service/raster.py
+# PDF → page image rasterization.
+#
+# "batch" renders every page in one pdftoppm run — one PDF parse, but all
+# page bitmaps are resident at once (~6MB per letter page at 150 DPI).
+# "windowed" renders RASTER_WINDOW_PAGES pages per run, so peak memory is
+# bounded by the window size while the PDF is still parsed once per window
+# rather than once per page.
+#
+# DPI is either one fixed value or chosen per page ("adaptive") from the
+# page size and the size of its text, capped by a pixel budget. Grayscale
+# rendering keeps one byte per pixel instead of three.
+#
+# Backends: "pdf2image" has pdftoppm write PPM files that PIL decodes and
+# NumPy then copies. "pnm" reads pdftoppm's raw PPM/PGM stream from a pipe
+# straight into the page array — no temp files, no PIL, one copy — and
+# hands pages over as pdftoppm finishes them rather than per window.
+#
+# Given a PageBufferPool, both backends render into reused page arrays; the
+# caller releases each page back to the pool once it is done with it.
+
+import logging
+import math
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+from pdf2image import convert_from_path
+
+from buffers import PageBufferPool
+
+logger = logging.getLogger("paddleocr-service.raster")
+
+RASTER_MODES = ("batch", "windowed")
+DPI_MODES = ("fixed", "adaptive")
+RASTER_BACKENDS = ("pdf2image", "pnm")
+
+# Longest the pnm backend waits for pdftoppm to hand over the next page
+# before killing it. Only time spent reading counts: the clock is stopped
+# while the caller has the page (OCR, waiting for an engine turn).
+PNM_PAGE_TIMEOUT_S = 30
+
+_PAGE_SIZE_RE = re.compile(r"^Page\s+(\d+) size:\s+([\d.]+) x ([\d.]+) pts", re.MULTILINE)
+
+
+class RenderError(Exception):
+    """pdftoppm could not render the pages: it failed or timed out."""
+
+
+@dataclass(frozen=True)
+class DpiPolicy:
+    """Per-page DPI choice for adaptive rasterization.
+
+    Text is rendered so a typical line is about target_line_px tall — small
+    print gets more DPI, large type less — within [min_dpi, max_dpi]. Pages
+    with no measurable text get base_dpi. Either way the page is capped at
+    max_pixels, so an oversized spread can't blow up memory or OCR time.
+    """
+
+    base_dpi: int
+    min_dpi: int
+    max_dpi: int
+    target_line_px: int
+    max_pixels: int
+
+    def choose(self, width_pt: float, height_pt: float, line_height_pt: float | None) -> int:
+        if line_height_pt:
+            dpi = self.target_line_px * 72 / line_height_pt
+            dpi = min(self.max_dpi, max(self.min_dpi, dpi))
+        else:
+            dpi = self.base_dpi
+        area_sq_in = (width_pt / 72) * (height_pt / 72)
+        if area_sq_in > 0:
+            dpi = min(dpi, math.sqrt(self.max_pixels / area_sq_in))
+        # Round down to a multiple of 10 so neighbouring pages tend to share a
+        # DPI (one pdftoppm call per run) and re-renders stay pixel-identical
+        return max(10, int(dpi) // 10 * 10)
+
+
+def read_page_sizes(
+    pdf_path: str, first_page: int, last_page: int
+) -> dict[int, tuple[float, float]]:
+    """Page sizes in points from `pdfinfo -f -l`, keyed by page number."""
+    proc = subprocess.run(
+        ["pdfinfo", "-f", str(first_page), "-l", str(last_page), pdf_path],
+        capture_output=True,
+        check=True,
+        text=True,
+        timeout=60,
+    )
+    return {
+        int(num): (float(width), float(height))
+        for num, width, height in _PAGE_SIZE_RE.findall(proc.stdout)
+    }
+
+
+def page_windows(
+    pages: list[int], window: int, dpi_for: Callable[[int], int] | None = None
+) -> list[tuple[int, int]]:
+    """Split sorted page numbers into (first, last) runs of consecutive pages,
+    each at most `window` long and sharing one DPI — one pdftoppm call per run."""
+    windows: list[tuple[int, int]] = []
+    for page in pages:
+        if windows:
+            first, last = windows[-1]
+            same_dpi = dpi_for is None or dpi_for(page) == dpi_for(last)
+            if page == last + 1 and last - first + 1 < window and same_dpi:
+                windows[-1] = (first, page)
+                continue
+        windows.append((page, page))
+    return windows
+
+
+def read_pnm(
+    stream: BinaryIO, buffers: PageBufferPool | None = None
+) -> np.ndarray | None:
+    """Read one binary PPM (P6) or PGM (P5) image into a uint8 array — a new
+    one, or one from `buffers`.
+
+    Returns None at a clean end of stream. Pixel data is read directly into
+    the array's buffer.
+    """
+    magic = stream.read(2)
+    if not magic:
+        return None
+    if magic not in (b"P5", b"P6"):
+        raise ValueError(f"Not a binary PNM stream (magic {magic!r})")
+
+    # width, height, maxval — whitespace-separated, "#" comments allowed;
+    # exactly one whitespace byte separates maxval from the pixel data
+    fields: list[int] = []
+    token = b""
+    while len(fields) < 3:
+        ch = stream.read(1)
+        if not ch:
+            raise EOFError("Truncated PNM header")
+        if ch == b"#" and not token:
+            stream.readline()
+        elif ch.isspace():
+            if token:
+                fields.append(int(token))
+                token = b""
+        else:
+            token += ch
+    width, height, maxval = fields
+    if maxval != 255:
+        raise ValueError(f"Unsupported PNM maxval {maxval}")
+
+    shape = (height, width, 3) if magic == b"P6" else (height, width)
+    img_array = buffers.acquire(shape) if buffers is not None else np.empty(shape, dtype=np.uint8)
+    buf = memoryview(img_array).cast("B")
+    filled = 0
+    while filled < len(buf):
+        n = stream.readinto(buf[filled:])
+        if not n:
+            raise EOFError(f"Truncated PNM data ({filled}/{len(buf)} bytes)")
+        filled += n
+    return img_array
+
+
+def _render_pnm(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    dpi: int,
+    grayscale: bool,
+    buffers: PageBufferPool | None,
+) -> Iterator[np.ndarray]:
+    cmd = ["pdftoppm", "-q", "-r", str(dpi), "-f", str(first_page), "-l", str(last_page)]
+    if grayscale:
+        cmd.append("-gray")
+    # No output root: pdftoppm writes every page to stdout, back to back
+    cmd.append(pdf_path)
+    # stderr goes to a file, not a pipe: nobody reads it until stdout is
+    # done, so a pipe that fills up with warnings would stall pdftoppm
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
+
+        def read_page() -> np.ndarray | None:
+            # Killing pdftoppm ends the read
+            timer = threading.Timer(PNM_PAGE_TIMEOUT_S, kill)
+            timer.start()
+            try:
+                return read_pnm(proc.stdout, buffers)
+            finally:
+                timer.cancel()
+
+        try:
+            try:
+                while (img_array := read_page()) is not None:
+                    yield img_array
+                    del img_array
+            except EOFError:
+                if proc.wait() == 0:
+                    raise
+            returncode = proc.wait()
+            if timed_out.is_set():
+                raise RenderError(
+                    f"pdftoppm took over {PNM_PAGE_TIMEOUT_S}s on a page "
+                    f"(pages {first_page}-{last_page})"
+                )
+            if returncode != 0:
+                stderr.seek(0)
+                detail = stderr.read().decode(errors="replace").strip()[-500:]
+                raise RenderError(
+                    f"pdftoppm exited {returncode} on pages {first_page}-{last_page}: {detail}"
+                )
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+
+def _render_pdf2image(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    dpi: int,
+    grayscale: bool,
+    thread_count: int,
+    buffers: PageBufferPool | None,
+) -> Iterator[np.ndarray]:
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        grayscale=grayscale,
+        # pdf2image splits the range across this many pdftoppm processes
+        thread_count=min(thread_count, last_page - first_page + 1),
+    )
+    for offset in range(len(images)):
+        img = images[offset]
+        images[offset] = None  # type: ignore[assignment]
+        if buffers is not None:
+            pixels = np.asarray(img)
+            img_array = buffers.acquire(pixels.shape)
+            np.copyto(img_array, pixels)
+            del pixels
+        else:
+            img_array = np.array(img)
+        # Free PIL image immediately
+        del img
+        yield img_array
+        del img_array
+
+
+def render_pages(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    dpi: int,
+    grayscale: bool = False,
+    backend: str = "pdf2image",
+    thread_count: int = 1,
+    buffers: PageBufferPool | None = None,
+) -> Iterator[np.ndarray]:
+    """Yield page arrays (H×W×3 RGB, or H×W when grayscale) for a page range.
+
+    thread_count only applies to the pdf2image backend; the pnm backend
+    streams from a single pdftoppm process. With `buffers`, pages are drawn
+    from the pool and the caller should release each one when done.
+    """
+    if backend not in RASTER_BACKENDS:
+        raise ValueError(f"Unknown raster backend {backend!r} (expected one of {RASTER_BACKENDS})")
+    if backend == "pnm":
+        return _render_pnm(pdf_path, first_page, last_page, dpi, grayscale, buffers)
+    return _render_pdf2image(
+        pdf_path, first_page, last_page, dpi, grayscale, thread_count, buffers
+    )
+
+
+class PageRasterizer:
+    """Iterate (page_number, dpi, page array) triples for a PDF, in page order.
+
+    `pages` restricts rendering to a subset (default: every page).
+    `page_dpi` overrides `dpi` for individual pages; `grayscale` renders
+    single-channel pages; `buffers` renders into pooled page arrays.
+
+    Pages are handed over one at a time and dropped from the rasterizer's
+    own bookkeeping as soon as they are yielded, so the caller controls
+    their lifetime. Cumulative rendering wall time is tracked in raster_ms.
+    """
+
+    def __init__(
+        self,
+        pdf_path: str,
+        total_pages: int,
+        dpi: int,
+        mode: str = "windowed",
+        window: int = 8,
+        thread_count: int = 1,
+        pages: list[int] | None = None,
+        page_dpi: dict[int, int] | None = None,
+        grayscale: bool = False,
+        backend: str = "pdf2image",
+        buffers: PageBufferPool | None = None,
+    ):
+        if mode not in RASTER_MODES:
+            raise ValueError(f"Unknown raster mode {mode!r} (expected one of {RASTER_MODES})")
+        self.pdf_path = pdf_path
+        self.total_pages = total_pages
+        self.dpi = dpi
+        self.mode = mode
+        self.window = max(1, total_pages if mode == "batch" else window)
+        self.thread_count = max(1, thread_count)
+        self.pages = sorted(pages) if pages is not None else list(range(1, total_pages + 1))
+        self.page_dpi = page_dpi or {}
+        self.grayscale = grayscale
+        self.backend = backend
+        self.buffers = buffers
+        self.raster_ms = 0
+
+    def dpi_for(self, page: int) -> int:
+        return self.page_dpi.get(page, self.dpi)
+
+    def __iter__(self) -> Iterator[tuple[int, int, np.ndarray]]:
+        for first_page, last_page in page_windows(self.pages, self.window, self.dpi_for):
+            dpi = self.dpi_for(first_page)
+            rendered = render_pages(
+                self.pdf_path,
+                first_page,
+                last_page,
+                dpi,
+                grayscale=self.grayscale,
+                backend=self.backend,
+                thread_count=self.thread_count,
+                buffers=self.buffers,
+            )
+            # Only time spent producing pages counts, not the caller's work
+            # between them (the pnm backend renders while being consumed)
+            elapsed = 0.0
+            page_num = first_page
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        img_array = next(rendered)
+                    except StopIteration:
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    yield page_num, dpi, img_array
+                    del img_array
+                    page_num += 1
+            finally:
+                rendered.close()
+            elapsed_ms = int(elapsed * 1000)
+            self.raster_ms += elapsed_ms
+            logger.info(
+                f"Rasterized pages {first_page}-{last_page} at {dpi} DPI "
+                f"({self.backend}) in {elapsed_ms}ms"
+            )
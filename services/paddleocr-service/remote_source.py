@@ -0,0 +1,91 @@
+# services/paddleocr-service/remote_source.py
+# Fetch a PDF by URL straight into a temp file.
+#
+# The PaddleOcrAdapter used to download a guide from a Supabase signed URL
+# and then upload the same bytes to us. Given the URL instead, the service
+# streams the download to disk itself — one transfer, nothing buffered in
+# the browser — with the size cap enforced as bytes arrive, not after.
+#
+# Only hosts listed in SOURCE_URL_ALLOWED_HOSTS may be fetched, so the
+# endpoint can't be used to reach arbitrary internal addresses. Redirects
+# are not followed for the same reason.
+
+import hashlib
+import posixpath
+from typing import BinaryIO
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+CHUNK_BYTES = 65536
+
+# Set on a 400/502 caused by the source URL itself ("rejected" or
+# "fetch_failed"), so a client can fall back to uploading the bytes
+SOURCE_ERROR_HEADER = "X-Source-Url-Error"
+
+
+class SourceRejected(Exception):
+    """The URL is not one we will fetch (scheme or host not allowed)."""
+
+
+class SourceTooLarge(Exception):
+    """The download exceeded the byte cap (declared or actual)."""
+
+
+class SourceFetchError(Exception):
+    """The source could not be downloaded (connection error or non-200)."""
+
+
+def parse_allowed_hosts(value: str) -> frozenset[str]:
+    """SOURCE_URL_ALLOWED_HOSTS: comma-separated hostnames, optionally host:port."""
+    return frozenset(host.strip().lower() for host in value.split(",") if host.strip())
+
+
+def check_url(url: str, allowed_hosts: frozenset[str]) -> None:
+    """Raise SourceRejected unless url is http(s) on an allowed host."""
+    if not allowed_hosts:
+        raise SourceRejected("Fetching by URL is not enabled on this service")
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise SourceRejected("Source URL must be http or https")
+    try:
+        port = parts.port
+    except ValueError:
+        raise SourceRejected("Source URL has an invalid port") from None
+    host = (parts.hostname or "").lower()
+    netloc = f"{host}:{port}" if port else host
+    if host not in allowed_hosts and netloc not in allowed_hosts:
+        raise SourceRejected(f"Source host {netloc!r} is not allowed")
+
+
+def filename_from_url(url: str) -> str:
+    """The last path segment, for logs and batch records (signed URLs end in it)."""
+    return posixpath.basename(unquote(urlsplit(url).path)) or "document.pdf"
+
+
+async def download(
+    client: httpx.AsyncClient, url: str, dest: BinaryIO, max_bytes: int
+) -> tuple[int, str]:
+    """Stream url into dest. Returns (size_bytes, sha256 hex).
+
+    Stops reading — and raises SourceTooLarge — as soon as the body passes
+    max_bytes, or up front when Content-Length already says it will.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async with client.stream("GET", url) as response:
+            if response.status_code != 200:
+                raise SourceFetchError(f"Source URL returned HTTP {response.status_code}")
+            declared = response.headers.get("content-length")
+            if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+                raise SourceTooLarge(f"Source is {declared} bytes")
+            async for chunk in response.aiter_bytes(CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise SourceTooLarge(f"Source exceeds {max_bytes} bytes")
+                hasher.update(chunk)
+                dest.write(chunk)
+    except httpx.HTTPError as err:
+        raise SourceFetchError(f"Could not fetch source URL: {err}") from err
+    return size, hasher.hexdigest()
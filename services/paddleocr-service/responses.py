@@ -0,0 +1,130 @@
+# services/paddleocr-service/responses.py
+# Response shaping and encoding for extraction results.
+#
+# A full result carries each table up to four times (html, values, the
+# page's tables list, and pipe-joined text in blocks/page text). Callers
+# can drop the parts they don't read with ?include= / ?exclude=; the rest
+# is serialized with orjson when installed and compressed with zstd or
+# gzip when the client accepts it.
+
+import gzip
+import json
+from dataclasses import dataclass
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback for local dev
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - gzip only
+    zstandard = None
+
+# Droppable parts of a result:
+#   html         tables[].html
+#   values       tables[].values
+#   blocks       pages[].blocks
+#   page_text    pages[].text
+#   page_tables  pages[].tables (the same tables as the top-level list)
+#   metrics      metrics
+OPTIONAL_FIELDS = ("html", "values", "blocks", "page_text", "page_tables", "metrics")
+
+_PAGE_FIELDS = {"blocks": "blocks", "page_text": "text", "page_tables": "tables"}
+_TABLE_FIELDS = {"html": "html", "values": "values"}
+
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+
+@dataclass(frozen=True)
+class ResponseOptions:
+    """Per-request response shaping — never part of the cache key."""
+
+    omit: frozenset[str] = frozenset()
+
+
+def _select_table(table: dict, omit: frozenset[str]) -> dict:
+    dropped = [key for field, key in _TABLE_FIELDS.items() if field in omit]
+    if not dropped:
+        return table
+    return {k: v for k, v in table.items() if k not in dropped}
+
+
+def select_page_fields(page: dict, omit: frozenset[str]) -> dict:
+    """Copy of a page without the omitted fields (the input is not modified)."""
+    if not omit:
+        return page
+    dropped = [key for field, key in _PAGE_FIELDS.items() if field in omit]
+    page = {k: v for k, v in page.items() if k not in dropped}
+    if "tables" in page:
+        page["tables"] = [_select_table(t, omit) for t in page["tables"]]
+    return page
+
+
+def select_fields(payload: dict, omit: frozenset[str]) -> dict:
+    """Copy of a result payload without the omitted fields.
+
+    Cached results are shared, so this builds new dicts rather than
+    deleting keys in place.
+    """
+    if not omit:
+        return payload
+    payload = {k: v for k, v in payload.items() if not (k == "metrics" and "metrics" in omit)}
+    payload["pages"] = [select_page_fields(page, omit) for page in payload["pages"]]
+    payload["tables"] = [_select_table(t, omit) for t in payload["tables"]]
+    return payload
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick zstd or gzip from an Accept-Encoding header, or None for identity."""
+    offered: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    candidates = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+    for encoding in candidates:
+        if offered.get(encoding, offered.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def encode_response(
+    payload: dict,
+    options: ResponseOptions,
+    accept_encoding: str,
+    min_compress_bytes: int,
+) -> Response:
+    """Serialize a result payload, compressing it when the client allows.
+
+    CPU-bound for large results — call from a worker thread.
+    """
+    body = dumps(select_fields(payload, options.omit))
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= min_compress_bytes else None
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
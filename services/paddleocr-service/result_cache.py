@@ -0,0 +1,175 @@
+# services/paddleocr-service/result_cache.py
+# Content-addressed on-disk caches: whole-document extraction results, and
+# per-page OCR output keyed on the rendered page pixels.
+#
+# Entries are JSON files named by their key. Recency is tracked through the
+# file mtime (bumped on every read) so the cache survives restarts; the LRU
+# order and sizes are read from the directory once, at startup, into an
+# in-memory index that lookups and writes keep up to date. That index
+# assumes one writer per directory: pool workers only read the page cache,
+# and the server process, which writes it, is told about their hits.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger("paddleocr-service.cache")
+
+# Once over the cap, evict down to this fraction of it, so the next few
+# writes don't each have to evict again
+EVICT_TO_FRACTION = 0.9
+
+
+def pixel_key(img_array, fingerprint: str) -> str:
+    """Cache key for a rendered page: hash of its pixels, shape and dtype.
+
+    Two PDFs that render a page to identical pixels share an entry, whatever
+    else differs between the files.
+    """
+    hasher = hashlib.sha256(f"{img_array.shape}|{img_array.dtype.str}|".encode("ascii"))
+    hasher.update(img_array.data if img_array.flags.c_contiguous else img_array.tobytes())
+    return f"{hasher.hexdigest()}-{fingerprint}"
+
+
+class DiskCache:
+    """Size-capped JSON store with least-recently-used eviction.
+
+    A max_bytes of 0 disables the cache: every lookup misses and writes are
+    dropped, so callers never need to special-case the disabled state.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = 0
+        # key -> size in bytes, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, path.stem, st.st_size))
+        entries.sort()
+        for _mtime, key, size in entries:
+            self._index[key] = size
+        self._size = sum(self._index.values())
+
+    def _touch(self, key: str) -> None:
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+
+    def contains(self, key: str) -> bool:
+        """Cheap existence check — bumps recency but not the hit counters."""
+        if not self.enabled:
+            return False
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._forget(key)
+            return False
+        self._touch(key)
+        return True
+
+    def get(self, key: str) -> dict | None:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._index:
+                self._index.move_to_end(key)
+        return value
+
+    def record(self, hit: bool, key: str | None = None) -> None:
+        """Count a lookup performed elsewhere (e.g. in a worker process); a
+        hit on `key` also bumps its recency here."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+                if key in self._index:
+                    self._index.move_to_end(key)
+            else:
+                self.misses += 1
+
+    def put(self, key: str, value: dict) -> None:
+        if not self.enabled:
+            return
+        data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(data) > self.max_bytes:
+            logger.info(f"Cache entry {key} ({len(data)} bytes) exceeds cap, not stored")
+            return
+
+        path = self._path(key)
+        # Write-then-rename so a concurrent reader never sees a partial file
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            os.replace(tmp_name, path)
+            self._size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries down to EVICT_TO_FRACTION of the
+        cap. Caller holds the lock."""
+        target = self.max_bytes * EVICT_TO_FRACTION
+        while self._size > target and self._index:
+            key, size = self._index.popitem(last=False)
+            self._path(key).unlink(missing_ok=True)
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
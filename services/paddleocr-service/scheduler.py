@@ -0,0 +1,193 @@
+# services/paddleocr-service/scheduler.py
+# Fair scheduling of documents and engine work between tenants.
+#
+# Every scarce thing a document needs is handed out in the same order:
+#   1. the next tenant in round-robin order that has something waiting, so
+#      one IMO's 100-page guide can't hold it while another's 3-page guide
+#      waits behind it;
+#   2. within that tenant, the document with the fewest pages left
+#      (shortest job first), aged by how long it has been waiting so a big
+#      document is never starved by a stream of small ones.
+#
+# Three places apply it: DocumentGate admits documents to the OCR executor
+# threads (instead of the executor's FIFO queue), and FairScheduler hands
+# out turns on the in-process engine (one page at a time) and slots on the
+# worker-process pool (one chunk of pages per worker).
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+from cancellation import CancelToken
+from telemetry import QUEUE_WAIT_SECONDS
+
+DEFAULT_TENANT = "default"
+
+
+class Ticket:
+    """One document's claim on the engine, created when it is admitted."""
+
+    def __init__(self, tenant: str, pages: int, cancel: CancelToken | None = None):
+        self.tenant = tenant
+        self.remaining = pages
+        self.cancel = cancel or CancelToken()
+        self.created_at = time.monotonic()
+        self.started_at: float | None = None
+        self.waiting_since: float | None = None
+
+    def mark_started(self) -> None:
+        """Record the document's queue wait, the first time it gets going."""
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+            # Not labelled by tenant: X-Tenant-Id is caller-supplied, and
+            # every distinct value would be a new series
+            QUEUE_WAIT_SECONDS.observe(self.started_at - self.created_at)
+
+
+class _FairQueue:
+    """Waiting tickets and the round-robin / shortest-job-first choice between
+    them. Callers hold their own lock.
+
+    aging_s_per_page: each that many seconds a ticket waits counts as one
+    page less when comparing documents within a tenant.
+    """
+
+    def __init__(self, capacity: int, aging_s_per_page: float, poll_interval_s: float):
+        self.capacity = max(1, capacity)
+        self.aging_s_per_page = aging_s_per_page
+        self.poll_interval_s = poll_interval_s
+        self._waiting: list[Ticket] = []
+        self._active = 0
+        self._last_tenant: str | None = None
+
+    def _priority(self, ticket: Ticket, now: float) -> float:
+        waited = now - ticket.waiting_since
+        return ticket.remaining - waited / self.aging_s_per_page
+
+    def _next(self) -> Ticket:
+        tenants = sorted({ticket.tenant for ticket in self._waiting})
+        # Round robin: the first tenant after the one served last, wrapping
+        later = [t for t in tenants if self._last_tenant is None or t > self._last_tenant]
+        tenant = later[0] if later else tenants[0]
+        now = time.monotonic()
+        return min(
+            (ticket for ticket in self._waiting if ticket.tenant == tenant),
+            key=lambda ticket: (self._priority(ticket, now), ticket.created_at),
+        )
+
+    def _can_grant(self, ticket: Ticket) -> bool:
+        return self._active < self.capacity and self._next() is ticket
+
+    def _grant(self, ticket: Ticket) -> None:
+        self._waiting.remove(ticket)
+        self._active += 1
+        self._last_tenant = ticket.tenant
+
+    def _stats(self) -> dict:
+        # Counts only — /health is unauthenticated, so no tenant ids
+        return {
+            "active": self._active,
+            "capacity": self.capacity,
+            "waiting": len(self._waiting),
+            "tenants_waiting": len({ticket.tenant for ticket in self._waiting}),
+        }
+
+
+class FairScheduler(_FairQueue):
+    """Grants `capacity` slots at a time to blocking callers (executor threads).
+
+    With capacity 1 a slot is a turn on the in-process engine; for the
+    worker pool it is one chunk of pages on one of the workers.
+    """
+
+    def __init__(
+        self, aging_s_per_page: float = 2.0, poll_interval_s: float = 0.5, capacity: int = 1
+    ):
+        super().__init__(capacity, aging_s_per_page, poll_interval_s)
+        self._cond = threading.Condition()
+
+    def acquire(self, ticket: Ticket) -> None:
+        """Wait for a slot. Raises Cancelled if the ticket's document is
+        cancelled while waiting."""
+        with self._cond:
+            ticket.waiting_since = time.monotonic()
+            self._waiting.append(ticket)
+            try:
+                while not self._can_grant(ticket):
+                    self._cond.wait(self.poll_interval_s)
+                    ticket.cancel.check()
+            except BaseException:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._grant(ticket)
+        ticket.mark_started()
+
+    def release(self, ticket: Ticket, pages: int = 1) -> None:
+        """Give a slot back once its `pages` pages are done. Safe from any thread."""
+        ticket.remaining = max(0, ticket.remaining - pages)
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def turn(self, ticket: Ticket):
+        """Hold a slot for one page."""
+        self.acquire(ticket)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return self._stats()
+
+
+class DocumentGate(_FairQueue):
+    """Admits documents to the OCR executor, `capacity` at a time.
+
+    Lives on the event loop: documents wait here, in fair order, rather than
+    in the executor's first-come-first-served queue, so a small document
+    from another tenant is next in line for a thread.
+    """
+
+    def __init__(
+        self, capacity: int, aging_s_per_page: float = 2.0, poll_interval_s: float = 0.5
+    ):
+        super().__init__(capacity, aging_s_per_page, poll_interval_s)
+        self._changed = asyncio.Event()
+
+    async def acquire(self, ticket: Ticket) -> None:
+        """Wait for an executor slot. Raises Cancelled if the ticket's
+        document is cancelled while waiting."""
+        ticket.waiting_since = time.monotonic()
+        self._waiting.append(ticket)
+        try:
+            while not self._can_grant(ticket):
+                self._changed.clear()
+                try:
+                    # Re-checked every poll anyway: aging changes the order
+                    await asyncio.wait_for(self._changed.wait(), self.poll_interval_s)
+                except TimeoutError:
+                    pass
+                ticket.cancel.check()
+        except BaseException:
+            self._waiting.remove(ticket)
+            self._changed.set()
+            raise
+        self._grant(ticket)
+
+    def release(self, _ticket: Ticket) -> None:
+        """Give the slot back once the document's executor work has returned.
+        Event loop only."""
+        self._active -= 1
+        self._changed.set()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def stats(self) -> dict:
+        return self._stats()
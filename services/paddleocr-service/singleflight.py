@@ -0,0 +1,85 @@
+# services/paddleocr-service/singleflight.py
+# Coalesce concurrent identical extractions into one computation.
+#
+# A double-clicked "Parse with OCR", or two admins parsing the same guide,
+# would otherwise queue two full OCR runs of the same bytes back to back.
+# The first request for a key starts a flight; requests for the same key
+# that arrive while it is running wait on it and share its result. The
+# result cache covers everything after the flight lands.
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from cancellation import CLIENT_DISCONNECT, CancelToken
+
+logger = logging.getLogger("paddleocr-service.singleflight")
+
+
+class Flight:
+    """One in-flight computation and the requests waiting on it.
+
+    The computation gets its own cancel token, not any one request's: it is
+    cancelled only once every waiter has given up, so the request that
+    started it can leave without failing the others.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.cancel = CancelToken()
+        self.waiters = 0
+        self.task: asyncio.Task | None = None
+
+
+class SingleFlight:
+    def __init__(self, poll_interval_s: float = 0.5):
+        self.poll_interval_s = poll_interval_s
+        self._flights: dict[str, Flight] = {}
+
+    def get(self, key: str) -> Flight | None:
+        return self._flights.get(key)
+
+    def start(self, key: str, compute: Callable[[CancelToken], Awaitable]) -> Flight:
+        """Run compute(cancel) as the flight for key. There must not be one already."""
+        flight = Flight(key)
+        flight.task = asyncio.create_task(compute(flight.cancel), name=f"flight-{key[:12]}")
+        flight.task.add_done_callback(lambda task: self._land(flight, task))
+        self._flights[key] = flight
+        return flight
+
+    def _forget(self, flight: Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def _land(self, flight: Flight, task: asyncio.Task) -> None:
+        self._forget(flight)
+        # Mark the error retrieved even when every waiter left before it came
+        if not task.cancelled():
+            task.exception()
+
+    async def wait(self, flight: Flight, cancel: CancelToken):
+        """The flight's result, or Cancelled once this caller's own token is.
+
+        Leaving never cancels the computation while others still wait on it.
+        """
+        flight.waiters += 1
+        try:
+            while True:
+                done, _ = await asyncio.wait({flight.task}, timeout=self.poll_interval_s)
+                if done:
+                    return flight.task.result()
+                cancel.check()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                logger.info(f"Every request for {flight.key[:12]} left — cancelling")
+                flight.cancel.cancel(cancel.reason or CLIENT_DISCONNECT)
+                # Not joinable from here on: a retry arriving before the
+                # task reaches a page boundary starts a fresh flight
+                self._forget(flight)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "waiters": sum(flight.waiters for flight in self._flights.values()),
+        }
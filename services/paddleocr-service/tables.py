@@ -0,0 +1,127 @@
+# services/paddleocr-service/tables.py
+# PP-Structure table HTML → rectangular grid of cell strings.
+#
+# PP-Structure returns tables as HTML like:
+#   <table><thead><tr><td colspan="2">Commission</td></tr></thead>
+#   <tbody><tr><td>Year 1</td><td>Renewal</td></tr></tbody></table>
+#
+# Rate tables routinely merge header cells, so rowspan/colspan are honoured:
+# a spanned cell's text is repeated into every grid position it covers and
+# every row comes out the same width. One left-to-right pass over the
+# structural tags; work is proportional to the HTML length plus the grid
+# size.
+
+import html
+import re
+
+# Splitting on row/cell tags leaves each cell's content (up to the next
+# row/cell tag) as one chunk; inline markup inside it is stripped in one go.
+_STRUCTURE_RE = re.compile(r"<(/?)(tr|td|th)\b([^>]*)>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]*>")
+_SPAN_RE = re.compile(r"\b(row|col)span\s*=\s*[\"']?(\d+)", re.IGNORECASE)
+
+# HTML's own limits; rowspan="0" ("to the end of the section") is treated as 1
+_MAX_COLSPAN = 1000
+_MAX_ROWSPAN = 65534
+
+
+def _spans(attrs: str) -> tuple[int, int]:
+    rowspan = colspan = 1
+    if not attrs or "span" not in attrs.lower():
+        return rowspan, colspan
+    for kind, value in _SPAN_RE.findall(attrs):
+        if kind.lower() == "row":
+            rowspan = min(max(1, int(value)), _MAX_ROWSPAN)
+        else:
+            colspan = min(max(1, int(value)), _MAX_COLSPAN)
+    return rowspan, colspan
+
+
+class _GridBuilder:
+    """Places cells row by row, carrying rowspans down into later rows."""
+
+    def __init__(self):
+        self.rows: list[list[str]] = []
+        # row index → {column: text} for cells spanning down from above
+        self._carry: dict[int, dict[int, str]] = {}
+        self._row: list[str | None] | None = None
+        self._col = 0
+
+    def _place(self, col: int, text: str) -> None:
+        row = self._row
+        if col >= len(row):
+            row.extend([None] * (col + 1 - len(row)))
+        row[col] = text
+
+    def open_row(self) -> None:
+        self.close_row()
+        self._row = []
+        self._col = 0
+        for col, text in self._carry.pop(len(self.rows), {}).items():
+            self._place(col, text)
+
+    def close_row(self) -> None:
+        if self._row is None:
+            return
+        if self._row:
+            self.rows.append(["" if text is None else text for text in self._row])
+        self._row = None
+
+    def add_cell(self, text: str, rowspan: int, colspan: int) -> None:
+        if self._row is None:
+            self.open_row()
+        row = self._row
+        if rowspan == colspan == 1 and self._col == len(row):
+            # Plain cell, nothing carried into this position
+            row.append(text)
+            self._col += 1
+            return
+        # Skip columns already taken by rowspans from above
+        while self._col < len(row) and row[self._col] is not None:
+            self._col += 1
+        first = self._col
+        for col in range(first, first + colspan):
+            self._place(col, text)
+        row_index = len(self.rows)
+        for offset in range(1, rowspan):
+            carried = self._carry.setdefault(row_index + offset, {})
+            for col in range(first, first + colspan):
+                carried[col] = text
+        self._col = first + colspan
+
+    def finish(self) -> list[list[str]]:
+        self.close_row()
+        # Rowspans reaching past the last row are dropped, as browsers do
+        width = max((len(row) for row in self.rows), default=0)
+        for row in self.rows:
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
+        return self.rows
+
+
+def _cell_text(raw: str) -> str:
+    if "<" in raw:
+        raw = _TAG_RE.sub("", raw)
+    if "&" in raw:
+        raw = html.unescape(raw)
+    return raw.strip()
+
+
+def parse_table_html(table_html: str) -> list[list[str]]:
+    """Parse PP-Structure table HTML into rows of cell text, all the same width."""
+    if not table_html:
+        return []
+
+    grid = _GridBuilder()
+    # [before, closing, name, attrs, content, closing, name, attrs, content, ...]
+    parts = _STRUCTURE_RE.split(table_html)
+    for i in range(1, len(parts), 4):
+        closing, name = parts[i], parts[i + 1].lower()
+        if name == "tr":
+            if closing:
+                grid.close_row()
+            else:
+                grid.open_row()
+        elif not closing:
+            grid.add_cell(_cell_text(parts[i + 3]), *_spans(parts[i + 2]))
+    return grid.finish()
@@ -0,0 +1,136 @@
+# services/paddleocr-service/telemetry.py
+# Prometheus metrics, served at GET /metrics.
+#
+# Metrics live in the process-wide default registry, which also carries the
+# standard process_* series (process_resident_memory_bytes for RSS, CPU,
+# open fds). With several uvicorn workers each process has its own
+# registry, so a scrape reflects whichever worker answered it.
+
+import gc
+import time
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily
+
+from cancellation import CANCEL_REASONS
+from engine_profiles import ROUTES
+
+# Seconds, from a cached-page OCR lookup up to a long document's upload
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGES = ("upload", "pdfinfo", "text_layer", "rasterize", "ocr", "postprocess", "split", "shard")
+
+STAGE_SECONDS = Histogram(
+    "paddleocr_stage_seconds",
+    "Time spent per stage: upload and pdfinfo per document; rasterize, ocr "
+    "and postprocess per page (ocr excludes page-cache hits); split per "
+    "fanned-out document and shard per successful shard request",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+
+PAGES = Counter(
+    "paddleocr_pages_total",
+    "Pages extracted, by source (ocr, page_cache, text_layer)",
+    ["source"],
+)
+PAGE_ROUTES = Counter(
+    "paddleocr_page_routes_total",
+    "OCR'd pages under ENGINE_ROUTING=auto, by route (structure, text)",
+    ["route"],
+)
+REGIONS = Counter(
+    "paddleocr_regions_total",
+    "Layout regions returned by the engine, by region type",
+    ["type"],
+)
+TABLES = Counter("paddleocr_tables_total", "Tables extracted")
+SHARD_REQUESTS = Counter(
+    "paddleocr_shard_requests_total",
+    "Shards of fanned-out documents sent to peers, by outcome (ok, error)",
+    ["outcome"],
+)
+REJECTIONS = Counter(
+    "paddleocr_rejections_total",
+    "Requests refused before extraction, by reason",
+    ["reason"],
+)
+CANCELLATIONS = Counter(
+    "paddleocr_cancellations_total",
+    "Extractions abandoned part-way, by reason (client_disconnect, deadline)",
+    ["reason"],
+)
+CANCELLED_PAGES = Counter(
+    "paddleocr_cancelled_pages_total", "Pages left unprocessed by cancelled extractions"
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "paddleocr_queue_wait_seconds",
+    "Per document: from admission until its first page is processed",
+    buckets=_STAGE_BUCKETS + (300, 600),
+)
+
+COALESCED_REQUESTS = Counter(
+    "paddleocr_coalesced_requests_total",
+    "Extract requests served by joining an identical extraction already in flight",
+)
+
+DOCUMENTS_IN_FLIGHT = Gauge(
+    "paddleocr_documents_in_flight", "Documents currently being extracted"
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "paddleocr_executor_queue_depth", "Tasks waiting for the OCR executor thread"
+)
+JOB_QUEUE_DEPTH = Gauge("paddleocr_job_queue_depth", "Async jobs waiting to start")
+READY = Gauge("paddleocr_ready", "1 once the engine is loaded and warmed up")
+WARMUP_SECONDS = Gauge("paddleocr_warmup_seconds", "Engine load plus warm-up inference time")
+
+for _stage in STAGES:
+    STAGE_SECONDS.labels(_stage)
+for _reason in (
+    "file_too_large",
+    "too_many_pages",
+    "too_many_files",
+    "invalid_pdf",
+    "unauthorized",
+    "queue_full",
+):
+    REJECTIONS.labels(_reason)
+for _reason in CANCEL_REASONS:
+    CANCELLATIONS.labels(_reason)
+for _route in ROUTES:
+    PAGE_ROUTES.labels(_route)
+for _outcome in ("ok", "error"):
+    SHARD_REQUESTS.labels(_outcome)
+
+
+
+# Time spent in cyclic GC, per generation — prometheus_client already
+# exports python_gc_collections_total, but not how long collections took.
+# The gc callback only adds to plain floats: taking a metric's lock there
+# could deadlock against a collection triggered while that lock is held.
+_gc_seconds = [0.0, 0.0, 0.0]
+_gc_started_at = 0.0
+
+
+def _time_gc(phase: str, info: dict) -> None:
+    global _gc_started_at
+    if phase == "start":
+        _gc_started_at = time.perf_counter()
+    else:
+        _gc_seconds[info["generation"]] += time.perf_counter() - _gc_started_at
+
+
+class _GcTimeCollector:
+    def collect(self):
+        family = CounterMetricFamily(
+            "paddleocr_gc_seconds",
+            "Time spent in cyclic garbage collection, by generation",
+            labels=["generation"],
+        )
+        for generation, seconds in enumerate(_gc_seconds):
+            family.add_metric([str(generation)], seconds)
+        yield family
+
+
+gc.callbacks.append(_time_gc)
+REGISTRY.register(_GcTimeCollector())
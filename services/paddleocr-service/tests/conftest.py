@@ -0,0 +1,9 @@
+# services/paddleocr-service/tests/conftest.py
+# The service's modules import each other as top-level modules (they run
+# from the service directory in the container), so put it on the path.
+
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
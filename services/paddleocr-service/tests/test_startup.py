@@ -0,0 +1,93 @@
+# services/paddleocr-service/tests/test_startup.py
+# Smoke tests: the service's modules load and the app starts.
+#
+# The module-level config in app.py runs at import, so a name used before
+# it is defined or an env var that fails validation stops the service
+# before it serves anything. Each import runs in a fresh interpreter so
+# the environment can differ per test.
+#
+# Usage (from services/paddleocr-service):
+#   python -m pytest -q tests
+
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SERVICE_DIR
+
+APP_DEPENDENCIES = ("fastapi", "httpx", "paddleocr", "pdf2image", "prometheus_client")
+
+
+def _import_app(code: str, **env) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", "import app\n" + code],
+        cwd=SERVICE_DIR,
+        env=dict(os.environ, WARMUP_ENABLED="0", OCR_WORKERS="1", **env),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+@pytest.fixture
+def app_dependencies():
+    for name in APP_DEPENDENCIES:
+        pytest.importorskip(name)
+
+
+def test_no_undefined_names():
+    """Catches what would otherwise only fail at import: names used before
+    they are defined, missing imports. Needs none of the service's deps."""
+    pyflakes_api = pytest.importorskip("pyflakes.api")
+    from pyflakes.messages import UndefinedExport, UndefinedLocal, UndefinedName
+
+    class Reporter:
+        def __init__(self):
+            self.problems = []
+
+        def flake(self, message):
+            if isinstance(message, (UndefinedName, UndefinedLocal, UndefinedExport)):
+                self.problems.append(str(message))
+
+        def syntaxError(self, filename, msg, lineno, offset, text):
+            self.problems.append(f"{filename}:{lineno}: {msg}")
+
+        def unexpectedError(self, filename, msg):
+            self.problems.append(f"{filename}: {msg}")
+
+    reporter = Reporter()
+    paths = sorted(glob.glob(os.path.join(SERVICE_DIR, "*.py")))
+    paths += sorted(glob.glob(os.path.join(SERVICE_DIR, "benchmarks", "*.py")))
+    for path in paths:
+        pyflakes_api.checkPath(path, reporter)
+    assert reporter.problems == []
+
+
+def test_app_imports(app_dependencies):
+    result = _import_app(
+        "paths = {route.path for route in app.app.routes}\n"
+        "assert {'/health', '/ready', '/api/extract'} <= paths, paths\n"
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_app_starts(app_dependencies):
+    result = _import_app(
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(app.app) as client:\n"
+        "    response = client.get('/health')\n"
+        "    assert response.status_code == 200, response.text\n"
+    )
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize(
+    "name", ["ENGINE_ROUTING", "RASTER_DPI_MODE", "RASTER_MODE", "RASTER_BACKEND"]
+)
+def test_bad_setting_fails_at_import(app_dependencies, name):
+    result = _import_app("", **{name: "bogus"})
+    assert result.returncode != 0
+    assert f"Unknown {name} 'bogus'" in result.stderr
@@ -0,0 +1,171 @@
+# services/paddleocr-service/text_layer.py
+# Embedded text layer via poppler's pdftotext -bbox-layout.
+#
+# Digitally generated guides already carry exact text; reading it costs a
+# few milliseconds per page against seconds of OCR. Pages whose layer is
+# missing, garbled or table-heavy are left to the OCR path — PP-Structure
+# is still what recovers table structure.
+
+import logging
+import statistics
+import subprocess
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("paddleocr-service.text_layer")
+
+_NS = "{http://www.w3.org/1999/xhtml}"
+
+# A page needs at least this many non-whitespace characters to be trusted
+TEXT_LAYER_MIN_CHARS = 80
+# ...and at least this share of them must be letters/digits/punctuation we
+# expect (broken ToUnicode maps produce runs of symbols or U+FFFD).
+TEXT_LAYER_MIN_CLEAN_RATIO = 0.75
+# Lines sharing a baseline with lines from 2+ other blocks look like table
+# cells; above this share of such lines the page goes to PP-Structure.
+TEXT_LAYER_MAX_GRID_RATIO = 0.3
+
+
+@dataclass
+class TextLine:
+    text: str
+    bbox: tuple[float, float, float, float]
+
+
+@dataclass
+class TextBlock:
+    lines: list[TextLine]
+    bbox: tuple[float, float, float, float]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(line.text for line in self.lines)
+
+
+@dataclass
+class TextLayerPage:
+    page_number: int
+    width_pt: float
+    height_pt: float
+    blocks: list[TextBlock] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(block.text for block in self.blocks)
+
+    def median_line_height(self) -> float:
+        """Typical line height in points (0.0 for a page with no text)."""
+        heights = [line.bbox[3] - line.bbox[1] for block in self.blocks for line in block.lines]
+        return statistics.median(heights) if heights else 0.0
+
+
+def _bbox(el: ET.Element) -> tuple[float, float, float, float]:
+    return (
+        float(el.get("xMin", 0)),
+        float(el.get("yMin", 0)),
+        float(el.get("xMax", 0)),
+        float(el.get("yMax", 0)),
+    )
+
+
+def read_text_layer(pdf_path: str, first_page: int, last_page: int) -> dict[int, TextLayerPage]:
+    """Run pdftotext once over the page range and parse its XHTML output."""
+    proc = subprocess.run(
+        [
+            "pdftotext",
+            "-bbox-layout",
+            "-enc",
+            "UTF-8",
+            "-f",
+            str(first_page),
+            "-l",
+            str(last_page),
+            pdf_path,
+            "-",
+        ],
+        capture_output=True,
+        check=True,
+        timeout=120,
+    )
+
+    pages: dict[int, TextLayerPage] = {}
+    root = ET.fromstring(proc.stdout)
+    for offset, page_el in enumerate(root.iter(f"{_NS}page")):
+        page = TextLayerPage(
+            page_number=first_page + offset,
+            width_pt=float(page_el.get("width", 0)),
+            height_pt=float(page_el.get("height", 0)),
+        )
+        for block_el in page_el.iter(f"{_NS}block"):
+            lines = []
+            for line_el in block_el.iter(f"{_NS}line"):
+                words = [w.text or "" for w in line_el.iter(f"{_NS}word")]
+                if words:
+                    lines.append(TextLine(" ".join(words), _bbox(line_el)))
+            if lines:
+                page.blocks.append(TextBlock(lines, _bbox(block_el)))
+        pages[page.page_number] = page
+    return pages
+
+
+def assess_page(page: TextLayerPage) -> str | None:
+    """Return None when the text layer can stand in for OCR, else the reason not."""
+    text = "".join(page.text.split())
+    if len(text) < TEXT_LAYER_MIN_CHARS:
+        return "sparse"
+
+    clean = sum(1 for ch in text if ch.isalnum() or ch in ".,;:!?'\"()[]/-%$&@#*+=<>_")
+    if clean / len(text) < TEXT_LAYER_MIN_CLEAN_RATIO:
+        return "garbled"
+
+    # Table heuristic: cells of one row are separate blocks on one baseline
+    baselines = [
+        (round(line.bbox[3] / 2), block_idx)  # 2pt buckets
+        for block_idx, block in enumerate(page.blocks)
+        for line in block.lines
+    ]
+    blocks_per_row: dict[int, set[int]] = {}
+    for row, block_idx in baselines:
+        blocks_per_row.setdefault(row, set()).add(block_idx)
+    grid_lines = sum(1 for row, _ in baselines if len(blocks_per_row[row]) >= 3)
+    if baselines and grid_lines / len(baselines) > TEXT_LAYER_MAX_GRID_RATIO:
+        return "table"
+
+    return None
+
+
+def build_text_layer_page(page: TextLayerPage, dpi: int) -> dict:
+    """Shape a text-layer page like an OCR'd one (pixel coordinates at dpi)."""
+    scale = dpi / 72.0
+    median_height = page.median_line_height()
+
+    blocks = []
+    for idx, block in enumerate(page.blocks):
+        block_height = block.bbox[3] - block.bbox[1]
+        # Short blocks set noticeably larger than body text read as headings
+        is_heading = (
+            len(block.lines) <= 2
+            and median_height > 0
+            and block_height / len(block.lines) >= 1.3 * median_height
+        )
+        blocks.append(
+            {
+                "block_id": f"p{page.page_number}-b{idx}",
+                "type": "heading" if is_heading else "paragraph",
+                "text": block.text,
+                "confidence": 1.0,
+                "bbox": [round(v * scale, 1) for v in block.bbox],
+            }
+        )
+
+    return {
+        "page_number": page.page_number,
+        "width": round(page.width_pt * scale),
+        "height": round(page.height_pt * scale),
+        "dpi": dpi,
+        "text": page.text,
+        "blocks": blocks,
+        "tables": [],
+        "cache_hit": False,
+        "source": "text_layer",
+    }
@@ -0,0 +1,52 @@
+# services/paddleocr-service/warmup.py
+# Synthetic page for warm-up inference.
+#
+# Building PP-Structure only loads weights; the first inference then pays
+# for workspace allocation and kernel setup on top of the actual OCR. The
+# service runs one throwaway page at startup so no user request does. The
+# page carries a heading, body text and a ruled table so the layout, text
+# and table models all run.
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+def synthetic_page(dpi: int) -> np.ndarray:
+    """A letter-size RGB page rendered at dpi, as the engine would receive it."""
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    scale = dpi / 72
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    heading = ImageFont.load_default(size=int(18 * scale))
+    body = ImageFont.load_default(size=int(10 * scale))
+
+    margin = int(72 * scale)
+    y = margin
+    draw.text((margin, y), "Commission Schedule", fill="black", font=heading)
+    y += int(36 * scale)
+    for line in (
+        "Rates apply to policies issued on or after the effective date below.",
+        "Chargebacks follow the schedule in section 4 of the agent agreement.",
+        "Advances are paid on the first annual premium only.",
+    ):
+        draw.text((margin, y), line, fill="black", font=body)
+        y += int(16 * scale)
+
+    y += int(24 * scale)
+    rows = [
+        ("Product", "Year 1", "Renewal"),
+        ("Term 10", "90%", "5%"),
+        ("Term 20", "100%", "5%"),
+        ("Whole Life", "80%", "3%"),
+    ]
+    col_width, row_height = int(140 * scale), int(24 * scale)
+    for r, row in enumerate(rows):
+        top = y + r * row_height
+        for c, cell in enumerate(row):
+            left = margin + c * col_width
+            draw.rectangle(
+                (left, top, left + col_width, top + row_height), outline="black", width=2
+            )
+            draw.text((left + int(6 * scale), top + int(6 * scale)), cell, fill="black", font=body)
+
+    return np.array(img)
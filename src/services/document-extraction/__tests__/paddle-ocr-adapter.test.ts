@@ -5,6 +5,7 @@ import type { ExtractionRequest } from "../../../types/document-extraction.types
 
 const {
   mockDownload,
+  mockCreateSignedUrl,
   mockUpdate,
   mockUpdateEq,
   mockPreflightNeq,
@@ -12,6 +13,7 @@ const {
   mockFromTable,
 } = vi.hoisted(() => ({
   mockDownload: vi.fn(),
+  mockCreateSignedUrl: vi.fn(),
   mockUpdate: vi.fn(),
   mockUpdateEq: vi.fn(),
   mockPreflightNeq: vi.fn(),
@@ -26,6 +28,8 @@ vi.mock("../../base/supabase", () => ({
         mockFrom(bucket);
         return {
           download: (path: string) => mockDownload(path),
+          createSignedUrl: (path: string, expiresIn: number) =>
+            mockCreateSignedUrl(path, expiresIn),
         };
       },
     },
@@ -191,6 +195,10 @@ describe("PaddleOcrAdapter", () => {
       data: new Blob(["fake-pdf"], { type: "application/pdf" }),
       error: null,
     });
+    mockCreateSignedUrl.mockReset().mockResolvedValue({
+      data: { signedUrl: "https://storage.example.com/signed/guide.pdf" },
+      error: null,
+    });
   });
 
   afterEach(() => {
@@ -249,11 +257,17 @@ describe("PaddleOcrAdapter", () => {
 
       // Find the OCR service call (not the status update calls)
       const ocrCall = mockFetch.mock.calls.find(
-        ([url]) => url === "/api/paddle-ocr",
+        ([url]) => String(url).startsWith("/api/paddle-ocr"),
       );
       expect(ocrCall).toBeDefined();
+      expect(ocrCall![0]).toBe(
+        "/api/paddle-ocr?exclude=html,page_tables,metrics&features=ocr",
+      );
       expect(ocrCall![1]?.method).toBe("POST");
       expect(ocrCall![1]?.body).toBeInstanceOf(FormData);
+      expect(
+        (ocrCall![1]?.headers as Record<string, string>)["X-Request-Timeout-Ms"],
+      ).toBe("600000");
 
       expect(result.documentId).toBe("doc-paddle-1");
       expect(result.metadata.pageCount).toBe(2);
@@ -264,6 +278,18 @@ describe("PaddleOcrAdapter", () => {
       );
     });
 
+    it("forwards requested features so the service can pick a cheaper pass", async () => {
+      mockFetch.mockResolvedValue(jsonResponse(makePaddleResponse()));
+
+      await adapter.extract(
+        makeRequest({ features: { ocr: true, tables: true, layout: true } }),
+      );
+
+      expect(String(mockFetch.mock.calls[0][0])).toContain(
+        "features=ocr,tables,layout",
+      );
+    });
+
     it("normalizes pages with correct structure", async () => {
       mockFetch.mockResolvedValue(jsonResponse(makePaddleResponse()));
 
@@ -349,7 +375,7 @@ describe("PaddleOcrAdapter", () => {
       await adapter.extract(makeRequest());
 
       const ocrCall = mockFetch.mock.calls.find(
-        ([url]) => url === "/api/paddle-ocr",
+        ([url]) => String(url).startsWith("/api/paddle-ocr"),
       );
       expect(ocrCall).toBeDefined();
       const headers = ocrCall![1]?.headers as Record<string, string>;
@@ -365,7 +391,7 @@ describe("PaddleOcrAdapter", () => {
       await adapter.extract(makeRequest());
 
       const ocrCall = mockFetch.mock.calls.find(
-        ([url]) => url === "/api/paddle-ocr",
+        ([url]) => String(url).startsWith("/api/paddle-ocr"),
       );
       const headers = ocrCall![1]?.headers as Record<string, string>;
       expect(headers["X-API-Key"]).toBeUndefined();
@@ -639,6 +665,13 @@ describe("PaddleOcrAdapter", () => {
       expect(mockFrom).toHaveBeenCalledWith("underwriting-guides");
       expect(mockDownload).toHaveBeenCalledWith("imo-1/guide.pdf");
       expect(result.documentId).toBe("doc-paddle-1");
+
+      const ocrCall = mockFetch.mock.calls.find(([url]) =>
+        String(url).startsWith("/api/paddle-ocr"),
+      );
+      expect(
+        (ocrCall![1]?.headers as Record<string, string>)["X-Tenant-Id"],
+      ).toBe("imo-1");
     });
 
     it("handles signed_url source by fetching", async () => {
@@ -657,4 +690,119 @@ describe("PaddleOcrAdapter", () => {
       expect(result.documentId).toBe("doc-paddle-1");
     });
   });
+
+  // ─── Fetch by URL ─────────────────────────────────────────────────────
+
+  describe("fetch by URL", () => {
+    beforeEach(() => {
+      vi.stubEnv("VITE_PADDLEOCR_FETCH_BY_URL", "true");
+    });
+
+    afterEach(() => {
+      vi.unstubAllEnvs();
+    });
+
+    it("sends a signed source_url for storage_path instead of downloading", async () => {
+      mockFetch.mockResolvedValue(jsonResponse(makePaddleResponse()));
+
+      await adapter.extract(
+        makeRequest({
+          source: {
+            type: "storage_path",
+            bucket: "underwriting-guides",
+            path: "imo-1/guide.pdf",
+          },
+        }),
+      );
+
+      expect(mockCreateSignedUrl).toHaveBeenCalledWith(
+        "imo-1/guide.pdf",
+        expect.any(Number),
+      );
+      expect(mockDownload).not.toHaveBeenCalled();
+
+      const body = mockFetch.mock.calls[0][1]?.body as FormData;
+      expect(body.get("source_url")).toBe(
+        "https://storage.example.com/signed/guide.pdf",
+      );
+      expect(body.get("file")).toBeNull();
+    });
+
+    it("passes a signed_url source through without fetching it", async () => {
+      mockFetch.mockResolvedValue(jsonResponse(makePaddleResponse()));
+
+      await adapter.extract(
+        makeRequest({
+          source: { type: "signed_url", url: "https://example.com/file.pdf" },
+        }),
+      );
+
+      expect(mockFetch).toHaveBeenCalledTimes(1);
+      const body = mockFetch.mock.calls[0][1]?.body as FormData;
+      expect(body.get("source_url")).toBe("https://example.com/file.pdf");
+    });
+
+    it("uploads the file when the service rejects the source URL", async () => {
+      mockFetch
+        .mockResolvedValueOnce(
+          new Response(
+            JSON.stringify({ detail: "Source host is not allowed" }),
+            { status: 400, headers: { "X-Source-Url-Error": "rejected" } },
+          ),
+        )
+        .mockResolvedValueOnce(jsonResponse(makePaddleResponse()));
+
+      const result = await adapter.extract(
+        makeRequest({
+          source: {
+            type: "storage_path",
+            bucket: "underwriting-guides",
+            path: "imo-1/guide.pdf",
+          },
+        }),
+      );
+
+      expect(result.metadata.pageCount).toBe(2);
+      expect(mockFetch).toHaveBeenCalledTimes(2);
+      expect(mockDownload).toHaveBeenCalledWith("imo-1/guide.pdf");
+      const retryBody = mockFetch.mock.calls[1][1]?.body as FormData;
+      expect(retryBody.get("file")).toBeInstanceOf(File);
+      expect(retryBody.get("source_url")).toBeNull();
+    });
+
+    it("does not retry other service errors by upload", async () => {
+      mockFetch.mockResolvedValue(
+        jsonResponse({ detail: "Unreadable PDF" }, 400),
+      );
+
+      await expect(
+        adapter.extract(
+          makeRequest({
+            source: { type: "signed_url", url: "https://example.com/file.pdf" },
+          }),
+        ),
+      ).rejects.toThrow("OCR service error 400");
+      expect(mockFetch).toHaveBeenCalledTimes(1);
+    });
+
+    it("throws when the storage URL cannot be signed", async () => {
+      mockCreateSignedUrl.mockResolvedValue({
+        data: null,
+        error: { message: "Object not found" },
+      });
+
+      await expect(
+        adapter.extract(
+          makeRequest({
+            source: {
+              type: "storage_path",
+              bucket: "underwriting-guides",
+              path: "imo-1/missing.pdf",
+            },
+          }),
+        ),
+      ).rejects.toThrow("Failed to sign storage URL: Object not found");
+      expect(mockFetch).not.toHaveBeenCalled();
+    });
+  });
 });
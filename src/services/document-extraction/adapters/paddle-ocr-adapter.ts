@@ -33,7 +33,7 @@ interface PaddleTable {
   rows: number;
   cols: number;
   values: string[][];
-  html: string;
+  html?: string;
   confidence: number;
   source_engine: string;
 }
@@ -44,7 +44,7 @@ interface PaddlePage {
   height: number;
   text: string;
   blocks: PaddleBlock[];
-  tables: PaddleTable[];
+  tables?: PaddleTable[];
 }
 
 interface PaddleOcrResponse {
@@ -76,9 +76,33 @@ interface UwParsedContent {
 /** Proxied through Vite dev server + Vercel rewrite to avoid CORS. */
 const EXTRACTOR_URL = "/api/paddle-ocr";
 
+/**
+ * Response fields normalize() never reads, dropped server-side. Table HTML
+ * and the per-page copies of each table are most of a large response.
+ */
+const EXCLUDED_FIELDS = "html,page_tables,metrics";
+
+/**
+ * Features the service understands. It runs the cheapest engine pass that
+ * covers the ones requested (e.g. plain OCR with no layout model for "ocr").
+ */
+const SERVICE_FEATURES = ["ocr", "tables", "layout"] as const;
+
 /** Default timeout (10 minutes — large guides with 50+ pages need time for OCR). */
 const DEFAULT_TIMEOUT_MS = 600_000;
 
+/**
+ * Signed URLs minted for the service to fetch a guide itself. It only has
+ * to start the download within this window.
+ */
+const SOURCE_URL_EXPIRY_S = 600;
+
+/**
+ * Set by the service when a source_url was refused (host not in its
+ * SOURCE_URL_ALLOWED_HOSTS) or could not be fetched.
+ */
+const SOURCE_ERROR_HEADER = "X-Source-Url-Error";
+
 // ─── Adapter ──────────────────────────────────────────────────────────────────
 
 export class PaddleOcrAdapter implements ExtractionAdapter {
@@ -161,25 +185,78 @@ export class PaddleOcrAdapter implements ExtractionAdapter {
   private async performExtraction(
     request: ExtractionRequest,
   ): Promise<ExtractionResult> {
-    const file = await this.resolveFile(request);
+    // Fetch-by-URL: hand the service a URL to download from storage itself
+    // instead of downloading the guide here and uploading the same bytes.
+    // The storage host must be in the service's SOURCE_URL_ALLOWED_HOSTS;
+    // if the service refuses or can't fetch the URL, upload the bytes.
+    const sourceUrl =
+      import.meta.env.VITE_PADDLEOCR_FETCH_BY_URL === "true"
+        ? await this.resolveSourceUrl(request)
+        : null;
+
+    let response: Response;
+    if (sourceUrl) {
+      const formData = new FormData();
+      formData.append("source_url", sourceUrl);
+      response = await this.callService(request, formData);
+      if (response.headers.get(SOURCE_ERROR_HEADER)) {
+        const detail = await response.text().catch(() => "unknown");
+        console.warn(
+          `[PaddleOcrAdapter] Service could not use source_url (${response.status}: ${detail}) — uploading instead`,
+        );
+        response = await this.uploadToService(request);
+      }
+    } else {
+      response = await this.uploadToService(request);
+    }
+
+    if (!response.ok) {
+      const text = await response.text().catch(() => "unknown");
+      throw new Error(
+        `[PaddleOcrAdapter] OCR service error ${response.status}: ${text}`,
+      );
+    }
+
+    const ocrResult: PaddleOcrResponse = await response.json();
+    return this.normalize(ocrResult, request.context);
+  }
 
+  /** POST the PDF bytes themselves to the service. */
+  private async uploadToService(request: ExtractionRequest): Promise<Response> {
     const formData = new FormData();
-    formData.append("file", file);
+    formData.append("file", await this.resolveFile(request));
+    return this.callService(request, formData);
+  }
 
+  /** POST one extract request; throws on timeout or an unreachable service. */
+  private async callService(
+    request: ExtractionRequest,
+    formData: FormData,
+  ): Promise<Response> {
     const timeoutMs = request.options?.timeoutMs ?? DEFAULT_TIMEOUT_MS;
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), timeoutMs);
 
+    // Same budget server-side: past it the service stops OCRing this
+    // document instead of finishing pages nobody will read.
+    const headers: Record<string, string> = {
+      "X-Request-Timeout-Ms": String(timeoutMs),
+    };
+    // Guides live under {imo_id}/ — the service schedules OCR fairly per IMO
+    if (request.source.type === "storage_path") {
+      const imoId = request.source.path.split("/")[0];
+      if (imoId) headers["X-Tenant-Id"] = imoId;
+    }
     // Pass API key if configured (cost-control gate on Railway service)
-    const headers: Record<string, string> = {};
     const apiKey = import.meta.env.VITE_PADDLEOCR_API_KEY;
     if (apiKey) {
       headers["X-API-Key"] = apiKey;
     }
 
-    let response: Response;
     try {
-      response = await fetch(EXTRACTOR_URL, {
+      const features = SERVICE_FEATURES.filter((f) => request.features?.[f]);
+      const query = `exclude=${EXCLUDED_FIELDS}&features=${features.join(",")}`;
+      return await fetch(`${EXTRACTOR_URL}?${query}`, {
         method: "POST",
         body: formData,
         headers,
@@ -197,16 +274,31 @@ export class PaddleOcrAdapter implements ExtractionAdapter {
     } finally {
       clearTimeout(timeoutId);
     }
+  }
 
-    if (!response.ok) {
-      const text = await response.text().catch(() => "unknown");
-      throw new Error(
-        `[PaddleOcrAdapter] OCR service error ${response.status}: ${text}`,
-      );
+  /** A URL the service can fetch the PDF from, or null to upload it instead. */
+  private async resolveSourceUrl(
+    request: ExtractionRequest,
+  ): Promise<string | null> {
+    const { source } = request;
+
+    if (source.type === "signed_url") {
+      return source.url;
     }
 
-    const ocrResult: PaddleOcrResponse = await response.json();
-    return this.normalize(ocrResult, request.context);
+    if (source.type === "storage_path") {
+      const { data, error } = await supabase.storage
+        .from(source.bucket)
+        .createSignedUrl(source.path, SOURCE_URL_EXPIRY_S);
+      if (error || !data?.signedUrl) {
+        throw new Error(
+          `[PaddleOcrAdapter] Failed to sign storage URL: ${error?.message ?? "empty response"}`,
+        );
+      }
+      return data.signedUrl;
+    }
+
+    return null;
   }
 
   /** Resolve the PDF file from the request source. */